@@ -0,0 +1,110 @@
+import re
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+
+AUDIO_CHUNK_SIZE = 64 * 1024
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range "Range: bytes=start-end" header.
+
+    Args:
+        range_header: Value of the Range request header, if any
+        size: Total size of the resource in bytes
+
+    Returns:
+        Optional[Tuple[int, int]]: Inclusive (start, end) byte positions, or None
+            when the whole resource should be sent
+    """
+    if not range_header:
+        return None
+    match = RANGE_PATTERN.match(range_header.strip())
+    if not match or match.groups() == ("", ""):
+        # Multiple or malformed ranges: ignore the header and send everything.
+        return None
+
+    start, end = match.groups()
+    if start == "":
+        # Suffix range: the last N bytes.
+        length = int(end)
+        if length == 0:
+            raise HTTPException(
+                status_code=416, headers={"Content-Range": f"bytes */{size}"}
+            )
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416, headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+
+def iter_file(
+    path: Path, start: int, end: int, chunk_size: int = AUDIO_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Yield bytes start..end (inclusive) of a file in chunks."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def audio_file_response(
+    path,
+    range_header: Optional[str] = None,
+    filename: str = "news_summary.mp3",
+    headers: Optional[dict] = None,
+    on_close: Optional[Callable[[], None]] = None,
+) -> StreamingResponse:
+    """
+    Stream an MP3 file from disk with Content-Length and Range support.
+
+    The file is read in AUDIO_CHUNK_SIZE pieces instead of being loaded into
+    memory. A satisfiable Range header produces a 206 Partial Content reply.
+    on_close is called once the body has been sent or the client went away.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    byte_range = parse_range(range_header, size)
+    start, end = byte_range or (0, size - 1)
+
+    response_headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(end - start + 1 if size else 0),
+        "Content-Disposition": f"attachment; filename={filename}",
+        **(headers or {}),
+    }
+    status_code = 200
+    if byte_range is not None:
+        status_code = 206
+        response_headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    def body() -> Iterator[bytes]:
+        try:
+            if size:
+                yield from iter_file(path, start, end)
+        finally:
+            if on_close is not None:
+                on_close()
+
+    return StreamingResponse(
+        body(),
+        status_code=status_code,
+        media_type="audio/mpeg",
+        headers=response_headers,
+    )
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+AUDIO_STORE_MAX_BYTES = int(
+    float(os.getenv("AUDIO_STORE_MAX_MB", "500")) * 1024 * 1024
+)
+AUDIO_STORE_MAX_AGE = float(os.getenv("AUDIO_STORE_MAX_AGE_HOURS", "24")) * 3600
+AUDIO_EVICTION_INTERVAL = float(os.getenv("AUDIO_EVICTION_INTERVAL", "300"))
+
+# A reference older than this is treated as abandoned (e.g. a download whose
+# client went away before the first byte) and no longer protects the file.
+REFERENCE_LEASE = 3600
+
+
+class AudioStore:
+    """Directory of rendered broadcasts named by the hash of their script.
+
+    The same script rendered with the same engine always maps to the same
+    file, so two requests never overwrite each other's output and an existing
+    render can be looked up instead of synthesized again. Files are evicted
+    oldest-first once they exceed the age or total size budget, except while
+    they are referenced by an in-flight download. Eviction runs on a
+    background thread started by the first save().
+    """
+
+    def __init__(
+        self,
+        root,
+        max_bytes: int = AUDIO_STORE_MAX_BYTES,
+        max_age: float = AUDIO_STORE_MAX_AGE,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._references: Dict[Path, List[float]] = {}
+        self._evictor: Optional[threading.Thread] = None
+
+    @staticmethod
+    def artifact_name(script: str, engine: str) -> str:
+        digest = hashlib.sha256(f"{engine}\n{script}".encode("utf-8")).hexdigest()
+        return f"tts_{digest[:32]}.mp3"
+
+    def path_for(self, script: str, engine: str) -> Path:
+        return self.root / self.artifact_name(script, engine)
+
+    def lookup(self, script: str, engine: str) -> Optional[Path]:
+        """Return the existing artifact for a script, refreshing its age, or None."""
+        path = self.path_for(script, engine)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def save(self, script: str, engine: str, data: bytes) -> Path:
+        """Atomically write the audio for a script and return its path."""
+        self.start_eviction()
+        path = self.path_for(script, engine)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return path
+
+    def acquire(self, path) -> Path:
+        """Protect a file from eviction until release() is called."""
+        path = Path(path).resolve()
+        with self._lock:
+            self._references.setdefault(path, []).append(time.time())
+        return path
+
+    def release(self, path):
+        path = Path(path).resolve()
+        with self._lock:
+            leases = self._references.get(path)
+            if leases:
+                leases.pop(0)
+                if not leases:
+                    del self._references[path]
+
+    def _is_referenced(self, path: Path, now: float) -> bool:
+        leases = self._references.get(path.resolve(), [])
+        return any(now - acquired < REFERENCE_LEASE for acquired in leases)
+
+    def evict(self) -> int:
+        """Delete expired and least recently used files; returns the count removed."""
+        now = time.time()
+        files = []
+        for path in self.root.glob("*.mp3"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        with self._lock:
+            for mtime, size, path in files:
+                expired = now - mtime > self.max_age
+                if not expired and total <= self.max_bytes:
+                    break
+                if self._is_referenced(path, now):
+                    continue
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+        return removed
+
+    def start_eviction(self, interval: float = AUDIO_EVICTION_INTERVAL):
+        """Run evict() now and then every interval seconds on a daemon thread.
+
+        Safe to call repeatedly; only one eviction thread is started.
+        """
+
+        def loop():
+            while True:
+                try:
+                    removed = self.evict()
+                    if removed:
+                        print(f"Evicted {removed} audio file(s) from {self.root}")
+                except Exception as e:
+                    print(f"Audio eviction failed: {str(e)}")
+                time.sleep(interval)
+
+        with self._lock:
+            if self._evictor is not None:
+                return self._evictor
+            self._evictor = threading.Thread(target=loop, name="audio-eviction", daemon=True)
+        self._evictor.start()
+        return self._evictor
+
+
+_stores: Dict[Path, AudioStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_audio_store(root="audio") -> AudioStore:
+    """Return the shared AudioStore for a directory."""
+    key = Path(root).resolve()
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = AudioStore(root)
+        return _stores[key]
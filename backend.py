@@ -1,73 +1,88 @@
-from fastapi import FastAPI, HTTPException, Response
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pathlib import Path
+from typing import Optional
 
+from audio_response import audio_file_response
+from event_loop import aclose_loop_clients, loop_monitor
+from headline_archive import headline_archive
+from jobs import JobWorkerPool, job_queue
+from llm_cache import llm_cache
 from models import NewsRequest
-from news_scraper import NewsScraper
-from social_analyzer import analyze_social_discussions
-
-app = FastAPI()
+from pipeline import briefing_key, build_briefing, collect_sources
+from prefetch import prefetch_scheduler, topic_popularity
+from rate_limiter import groq_limiter
+from singleflight import AsyncSingleFlight
+from tts_pipeline import iter_sentences, stream_tts
+from utils import (
+    audio_store,
+    scrape_breakers,
+    scrape_hedge,
+    stream_broadcast_news_with_groq,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop_monitor.start()
+    audio_store.start_eviction()
+    headline_archive.start_flusher()
+    job_workers.start()
+    prefetch_scheduler.start()
+    yield
+    await prefetch_scheduler.stop()
+    await job_workers.stop()
+    await loop_monitor.stop()
+    await aclose_loop_clients()
+    await asyncio.to_thread(headline_archive.flush)
+
+
+job_workers = JobWorkerPool(job_queue, build_briefing)
+briefing_flights = AsyncSingleFlight()
+app = FastAPI(lifespan=lifespan)
+
+
+def send_artifact(path, range_header=None, **kwargs):
+    """Stream a stored audio file, keeping it safe from eviction until sent."""
+    path = audio_store.acquire(path)
+    try:
+        return audio_file_response(
+            path, range_header, on_close=lambda: audio_store.release(path), **kwargs
+        )
+    except BaseException:
+        audio_store.release(path)
+        raise
 
 
 @app.post("/generate-news-audio")
-async def generate_news_audio(request: NewsRequest):
+async def generate_news_audio(request: NewsRequest, http_request: Request):
     try:
         print(
             f"Received request: topics={request.topics}, source_type={request.source_type}"
         )
-        results = {}
-
-        # Process both news and social media based on source_type
-        if request.source_type.lower() in ["news", "both"]:
-            print("Processing news...")
-            news_scraper = NewsScraper()
-            results["news"] = await news_scraper.scrape_news(request.topics)
-            print(
-                f"News results: {len(results.get('news', {}).get('news_analysis', {})) if results.get('news') else 0} topics"
-            )
-
-        if request.source_type.lower() in ["reddit", "social", "both"]:
-            print("Processing social media...")
-            results["social"] = await analyze_social_discussions(request.topics)
-            print(
-                f"Social results: {len(results.get('social', {}).get('social_analysis', {})) if results.get('social') else 0} topics"
-            )
-
-        news_data = results.get("news", {})
-        social_data = results.get("social", {})
-
-        # Use Groq instead of Ollama for faster processing
-        print("Generating broadcast news...")
-        from utils import generate_broadcast_news_with_groq
-
-        # Generate broadcast news using both sources
-        news_summary = generate_broadcast_news_with_groq(
-            news_data, social_data, request.topics
+        topic_popularity.record(request)
+        audio_path = await briefing_flights.do(
+            briefing_key(request), lambda: build_briefing(request)
         )
-        print(f"Generated summary length: {len(news_summary) if news_summary else 0}")
-
-        # Use free gTTS instead of ElevenLabs
-        print("Converting to audio...")
-        from utils import tts_to_audio
-
-        audio_path = tts_to_audio(text=news_summary, language="en")
-        print(f"Audio path: {audio_path}")
 
         if audio_path and Path(audio_path).exists():
-            with open(audio_path, "rb") as audio_file:
-                audio_bytes = audio_file.read()
-
-            return Response(
-                content=audio_bytes,
-                media_type="audio/mpeg",
-                headers={
-                    "Content-Disposition": "attachment; filename=news_summary.mp3"
-                },
+            # Stream from disk; the file is also reachable at /audio/<name>
+            # so players can seek and resume with Range requests.
+            return send_artifact(
+                audio_path,
+                http_request.headers.get("range"),
+                headers={"Content-Location": f"/audio/{Path(audio_path).name}"},
             )
         else:
             raise HTTPException(
                 status_code=500, detail="Audio file could not be generated or found."
             )
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in generate_news_audio: {str(e)}")
         import traceback
@@ -76,19 +91,146 @@ async def generate_news_audio(request: NewsRequest):
         raise HTTPException(status_code=500, detail=f"Error generating audio: {str(e)}")
 
 
+@app.post("/generate-news-audio/stream")
+async def stream_news_audio(request: NewsRequest):
+    """Stream the broadcast as MP3 while the script is still being written.
+
+    The Groq completion is consumed with stream=True, cut at sentence
+    boundaries and each sentence is synthesized as soon as it is complete.
+    """
+    try:
+        print(
+            f"Received streaming request: topics={request.topics}, source_type={request.source_type}"
+        )
+        topic_popularity.record(request)
+        news_data, social_data = await collect_sources(request)
+    except Exception as e:
+        print(f"Error in stream_news_audio: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error generating audio: {str(e)}")
+
+    script = stream_broadcast_news_with_groq(news_data, social_data, request.topics)
+    return StreamingResponse(
+        stream_tts(iter_sentences(script), language="en"),
+        media_type="audio/mpeg",
+        headers={"Content-Disposition": "inline; filename=news_summary.mp3"},
+    )
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: NewsRequest):
+    """Queue a briefing and return its job id immediately."""
+    topic_popularity.record(request)
+    job_id = await asyncio.to_thread(job_queue.submit, request)
+    job_workers.notify()
+    print(f"Queued job {job_id}: topics={request.topics}")
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}",
+        "result_url": f"/jobs/{job_id}/audio",
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Report a job's status and per-stage progress."""
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    job.pop("audio_path")
+    return job
+
+
+@app.get("/jobs/{job_id}/audio")
+async def get_job_audio(job_id: str, request: Request):
+    """Download the audio of a finished job."""
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=f"Job failed: {job['error']}")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}.")
+    if not job["audio_path"] or not Path(job["audio_path"]).is_file():
+        raise HTTPException(status_code=410, detail="Job audio has been evicted.")
+    return send_artifact(job["audio_path"], request.headers.get("range"))
+
+
+@app.get("/audio/{filename}")
+async def get_audio(filename: str, request: Request):
+    """Serve a rendered broadcast with Range support for seeking and resuming."""
+    audio_path = audio_store.root / Path(filename).name
+    if audio_path.suffix != ".mp3" or not audio_path.is_file():
+        raise HTTPException(status_code=404, detail="Audio file not found.")
+    return send_artifact(
+        audio_path, request.headers.get("range"), filename=audio_path.name
+    )
+
+
+def parse_since(since: Optional[str]) -> float:
+    """Accept a Unix timestamp or an ISO 8601 date/time."""
+    if not since:
+        return 0.0
+    try:
+        return float(since)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(since).timestamp()
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="'since' must be a Unix timestamp or an ISO 8601 date/time.",
+        )
+
+
+@app.get("/headlines")
+async def get_headlines(
+    topic: str, since: Optional[str] = None, limit: int = Query(100, ge=1, le=1000)
+):
+    """Archived headlines of a topic first seen since a given time, newest first."""
+    headlines = await asyncio.to_thread(
+        headline_archive.since, topic, parse_since(since), limit
+    )
+    return {"topic": topic, "count": len(headlines), "headlines": headlines}
+
+
+@app.get("/headlines/search")
+async def search_headlines(
+    q: str, topic: Optional[str] = None, limit: int = Query(50, ge=1, le=1000)
+):
+    """Keyword search over all archived headlines, best matches first."""
+    headlines = await asyncio.to_thread(headline_archive.search, q, topic, limit)
+    return {"query": q, "count": len(headlines), "headlines": headlines}
+
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "message": "Server is running"}
+    return {
+        "status": "healthy",
+        "message": "Server is running",
+        "event_loop": loop_monitor.stats(),
+        "groq_rate_limit": await asyncio.to_thread(groq_limiter.stats),
+        "scrape_methods": scrape_breakers.stats(),
+        "scrape_hedging": scrape_hedge.stats(),
+        "prefetch": prefetch_scheduler.stats(),
+    }
+
+
+@app.get("/cache-stats")
+async def cache_stats():
+    """Hit/miss counters of the LLM response cache, per call site."""
+    return {"llm_cache": llm_cache.stats()}
 
 
 @app.post("/test-groq")
 async def test_groq_only():
     """Test endpoint that only uses Groq for text generation"""
     try:
-        from utils import summarize_with_groq
+        from utils import async_summarize_with_groq
 
         test_text = "Breaking news: Local team wins championship"
-        summary = summarize_with_groq(test_text)
+        summary = await async_summarize_with_groq(test_text)
         return {"status": "success", "summary": summary}
     except Exception as e:
         return {"status": "error", "message": str(e)}
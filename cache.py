@@ -0,0 +1,151 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+CACHE_DIR = Path(os.getenv("CACHE_DIR", "cache"))
+
+
+@dataclass
+class CacheEntry:
+    value: bytes
+    metadata: dict = field(default_factory=dict)
+    expires_at: Optional[float] = None
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at is None or self.expires_at > time.time()
+
+
+class DiskCache:
+    """Persistent, size-bounded LRU cache stored in a single SQLite file.
+
+    Values are zlib-compressed on disk. Entries carry their own expiry, and a
+    stale entry is still returned when asked for (allow_stale=True) so callers
+    can revalidate it instead of re-downloading. Safe to share between threads
+    and between worker processes pointing at the same file.
+    """
+
+    def __init__(
+        self,
+        path,
+        max_bytes: int = 100 * 1024 * 1024,
+        default_ttl: Optional[float] = None,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), check_same_thread=False, timeout=30
+        )
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    metadata TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)"
+            )
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[CacheEntry]:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, metadata, expires_at FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+
+        entry = CacheEntry(zlib.decompress(row[0]), json.loads(row[1]), row[2])
+        if not entry.fresh and not allow_stale:
+            return None
+        return entry
+
+    def set(
+        self,
+        key: str,
+        value: bytes,
+        metadata: Optional[dict] = None,
+        ttl: Optional[float] = None,
+    ):
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        blob = zlib.compress(value)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    blob,
+                    json.dumps(metadata or {}),
+                    len(blob),
+                    now + ttl if ttl is not None else None,
+                    now,
+                ),
+            )
+            self._evict()
+
+    def touch(self, key: str, ttl: Optional[float] = None):
+        """Mark an entry as freshly validated, extending its expiry."""
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE entries SET expires_at = ?, accessed_at = ? WHERE key = ?",
+                (now + ttl if ttl is not None else None, now, key),
+            )
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total_bytes()
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        excess = self._total_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed_at"
+        ):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+BREAKER_FAILURES = int(os.getenv("SCRAPE_BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN = float(os.getenv("SCRAPE_BREAKER_COOLDOWN", "60"))
+BREAKER_WINDOW = int(os.getenv("SCRAPE_BREAKER_WINDOW", "20"))
+# Results lose half their weight in health() every half life, so a method
+# demoted by old failures drifts back to its configured place and is retried.
+BREAKER_HALF_LIFE = float(os.getenv("SCRAPE_BREAKER_HALF_LIFE", "300"))
+BREAKER_MIN_SAMPLES = float(os.getenv("SCRAPE_BREAKER_MIN_SAMPLES", "5"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Track the health of one fetch method and stop calling it while it fails.
+
+    After failure_threshold consecutive failures the breaker opens and allow()
+    refuses calls for cooldown seconds. The first call after the cooldown is
+    a probe (half open): success closes the breaker, failure reopens it.
+    Outcomes and latencies of the last window calls feed health(), weighted
+    by age with a half life of half_life seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURES,
+        cooldown: float = BREAKER_COOLDOWN,
+        window: int = BREAKER_WINDOW,
+        half_life: float = BREAKER_HALF_LIFE,
+        min_samples: float = BREAKER_MIN_SAMPLES,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.half_life = half_life
+        self.min_samples = min_samples
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.skipped = 0
+        self._probing = False
+        self._results = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now; half-open admits a single probe."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self._probing):
+                self._probing = self.state == HALF_OPEN
+                return True
+            self.skipped += 1
+            return False
+
+    def record_cancelled(self):
+        """A call was abandoned without an outcome; free the probe slot."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self._results.append((True, latency, time.monotonic()))
+            self.consecutive_failures = 0
+            self.state = CLOSED
+            self._probing = False
+
+    def record_failure(self, latency: float):
+        with self._lock:
+            self._results.append((False, latency, time.monotonic()))
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    print(f"⚠️ Circuit for '{self.name}' opened after "
+                          f"{self.consecutive_failures} failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def _weighted(self) -> tuple:
+        """(total weight, success rate, mean success latency) of aged results."""
+        now = time.monotonic()
+        total = successes = latency_sum = 0.0
+        for ok, latency, at in self._results:
+            weight = 0.5 ** ((now - at) / self.half_life)
+            total += weight
+            if ok:
+                successes += weight
+                latency_sum += weight * latency
+        rate = successes / total if total else 1.0
+        mean_latency = latency_sum / successes if successes else 0.0
+        return total, rate, mean_latency
+
+    def health(self) -> float:
+        """Score in [0, 1]: recent success rate, discounted by mean latency."""
+        with self._lock:
+            if self.state == OPEN:
+                return 0.0
+            total, rate, mean_latency = self._weighted()
+            if not total:
+                return 1.0
+            return rate / (1.0 + mean_latency / 10.0)
+
+    def rank(self) -> float:
+        """Ordering score: health once enough recent results back it, else 1.0.
+
+        Too few results (none yet, or only old ones) say little, so such a
+        method keeps its configured place instead of being promoted or
+        demoted by one call.
+        """
+        with self._lock:
+            if self.state == OPEN:
+                return 0.0
+            total, rate, mean_latency = self._weighted()
+            if total < self.min_samples:
+                return 1.0
+            return rate / (1.0 + mean_latency / 10.0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            results = list(self._results)
+            state = self.state
+            retry_in = (
+                max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+                if state == OPEN
+                else 0.0
+            )
+        latencies = sorted(latency for ok, latency, _ in results if ok)
+        return {
+            "state": state,
+            "health": round(self.health(), 3),
+            "calls": len(results),
+            "success_rate": (
+                round(sum(ok for ok, _, _ in results) / len(results), 3) if results else None
+            ),
+            "p50_latency_s": round(latencies[len(latencies) // 2], 3) if latencies else None,
+            "consecutive_failures": self.consecutive_failures,
+            "skipped": self.skipped,
+            "retry_in_s": round(retry_in, 1),
+        }
+
+
+class BreakerGroup:
+    """Circuit breakers for interchangeable methods, ordered by health."""
+
+    def __init__(self, names: Iterable[str]):
+        self.breakers: Dict[str, CircuitBreaker] = {
+            name: CircuitBreaker(name) for name in names
+        }
+
+    def __getitem__(self, name: str) -> CircuitBreaker:
+        return self.breakers[name]
+
+    def order(self, names: List[str]) -> List[str]:
+        """Sort names by rank(), best first; ties keep the given preference order.
+
+        Open breakers go last. Otherwise the given order only changes between
+        methods with enough recent results to compare.
+        """
+        return sorted(names, key=lambda name: -self.breakers[name].rank())
+
+    def stats(self) -> dict:
+        return {name: breaker.stats() for name, breaker in self.breakers.items()}
@@ -0,0 +1,143 @@
+import os
+import random
+import re
+from collections import defaultdict
+from typing import Dict, List, Sequence
+
+from dotenv import load_dotenv
+
+from prompt_budget import is_noise
+
+load_dotenv()
+
+
+DEDUP_HEADLINES = os.getenv("DEDUP_HEADLINES", "true").lower() == "true"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.5"))
+
+# 16 bands of 2 rows: pairs with Jaccard similarity 0.5 become candidates
+# with probability 1 - (1 - 0.5**2)**16 = 0.99; candidates are then checked
+# exactly, so the banding only has to be generous, not precise.
+BANDS = 16
+ROWS = 2
+# Each "permutation" XORs the 64-bit shingle hashes with its own random
+# mask, which is much cheaper than (a * h + b) mod p in pure Python.
+_rng = random.Random(20240601)
+_MASKS = [_rng.getrandbits(64) for _ in range(BANDS * ROWS)]
+
+WORD = re.compile(r"\w+")
+SOURCE_COUNT = re.compile(r" \((\d+) sources\)$")
+
+
+def shingles(headline: str) -> frozenset:
+    """Words and word bigrams of a headline.
+
+    Bigrams keep word order meaningful; single words keep one inserted or
+    dropped word ("a", "today") from splitting an otherwise identical pair.
+    """
+    words = [word.lower() for word in WORD.findall(headline)]
+    return frozenset(words) | frozenset(" ".join(pair) for pair in zip(words, words[1:]))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def minhash(shingle_set: frozenset) -> List[int]:
+    # str hashes are salted per process; signatures are never stored, so
+    # they only need to be consistent within one call.
+    hashes = [hash(shingle) & 0xFFFFFFFFFFFFFFFF for shingle in shingle_set] or [0]
+    return [min(h ^ mask for h in hashes) for mask in _MASKS]
+
+
+def cluster_headlines(
+    headlines: Sequence[str], threshold: float = DEDUP_THRESHOLD
+) -> List[List[int]]:
+    """
+    Group near-duplicate headlines with MinHash LSH.
+
+    Each headline is hashed once and bucketed per band, so only headlines
+    sharing a bucket are compared: near-linear in the number of headlines.
+
+    Returns:
+        List[List[int]]: Clusters of indices into headlines, each sorted and
+            ordered by their first member
+    """
+    sets = [shingles(headline) for headline in headlines]
+    parent = list(range(len(headlines)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets = defaultdict(list)
+    for index, shingle_set in enumerate(sets):
+        signature = minhash(shingle_set)
+        for band in range(BANDS):
+            buckets[(band, tuple(signature[band * ROWS : (band + 1) * ROWS]))].append(index)
+
+    checked = set()
+    for members in buckets.values():
+        for position, i in enumerate(members):
+            for j in members[position + 1 :]:
+                if (i, j) in checked:
+                    continue
+                checked.add((i, j))
+                if find(i) != find(j) and jaccard(sets[i], sets[j]) >= threshold:
+                    parent[max(find(i), find(j))] = min(find(i), find(j))
+
+    clusters = defaultdict(list)
+    for index in range(len(headlines)):
+        clusters[find(index)].append(index)
+    return sorted(clusters.values(), key=lambda cluster: cluster[0])
+
+
+def with_source_count(headline: str, count: int) -> str:
+    return f"{headline} ({count} sources)" if count > 1 else headline
+
+
+def strip_source_count(headline: str) -> str:
+    return SOURCE_COUNT.sub("", headline)
+
+
+def dedupe_topics(headlines_by_topic: Dict[str, str]) -> Dict[str, str]:
+    """
+    Collapse near-duplicate headlines within and across topics.
+
+    A story listed by several outlets, or under several of the requested
+    topics, is kept once: under the first topic and at the first position
+    it appears, annotated with how many sources carried it. A topic whose
+    stories are all covered by earlier topics keeps its own (deduplicated)
+    list rather than ending up empty. Page noise such as "Home" or
+    "3 hours ago" is dropped.
+
+    Args:
+        headlines_by_topic: Newline separated headlines per topic, in request order
+
+    Returns:
+        Dict[str, str]: The deduplicated headlines per topic
+    """
+    lines = {
+        topic: [
+            line.strip()
+            for line in headlines.split("\n")
+            if line.strip() and not is_noise(line.strip())
+        ]
+        for topic, headlines in headlines_by_topic.items()
+    }
+    entries = [(topic, headline) for topic in lines for headline in lines[topic]]
+    kept = defaultdict(list)
+    for cluster in cluster_headlines([headline for _, headline in entries]):
+        topic, headline = entries[cluster[0]]
+        kept[topic].append(with_source_count(headline, len(cluster)))
+
+    for topic in lines:
+        if lines[topic] and not kept[topic]:
+            kept[topic] = [
+                with_source_count(lines[topic][cluster[0]], len(cluster))
+                for cluster in cluster_headlines(lines[topic])
+            ]
+    return {topic: "\n".join(kept[topic]) for topic in headlines_by_topic}
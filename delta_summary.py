@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import weakref
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from cache import CACHE_DIR, DiskCache
+from dedup import strip_source_count
+from prompt_budget import SUMMARY_INPUT_TOKENS, fit_headlines, rank_headlines
+from singleflight import AsyncSingleFlight
+from utils import async_summarize_with_groq, async_update_summary_with_groq
+
+load_dotenv()
+
+
+DELTA_SUMMARIES = os.getenv("DELTA_SUMMARIES", "true").lower() == "true"
+# Re-summarize from scratch when more than this share of headlines is new,
+# or after this many incremental updates, so the script does not drift.
+DELTA_FULL_RATIO = float(os.getenv("DELTA_FULL_RATIO", "0.5"))
+DELTA_MAX_UPDATES = int(os.getenv("DELTA_MAX_UPDATES", "10"))
+TOPIC_STATE_TTL = float(os.getenv("TOPIC_STATE_TTL_HOURS", "24")) * 3600
+
+topic_state = DiskCache(
+    CACHE_DIR / "topics.sqlite", max_bytes=50 * 1024 * 1024, default_ttl=TOPIC_STATE_TTL
+)
+delta_flights = AsyncSingleFlight()
+# One revision of a topic's stored state at a time, per event loop; entries
+# disappear once no coroutine holds or waits for the lock.
+_topic_locks = weakref.WeakValueDictionary()
+
+
+def headline_key(headline: str) -> str:
+    # A story's source count changes between scrapes; it is still the same story
+    return " ".join(strip_source_count(headline).lower().split())
+
+
+def topic_key(topic: str) -> str:
+    return " ".join(topic.lower().split())
+
+
+def load_state(topic: str) -> Optional[dict]:
+    """
+    The last summary of a topic and its headline history.
+
+    seen holds the headlines a summary has covered and pending those that
+    were scraped but did not fit in a prompt yet, each with the time it was
+    first seen.
+    """
+    entry = topic_state.get(topic_key(topic))
+    return json.loads(entry.value) if entry is not None else None
+
+
+def save_state(topic: str, state: dict):
+    topic_state.set(topic_key(topic), json.dumps(state).encode("utf-8"))
+
+
+def new_headlines(headlines: List[str], state: Optional[dict]) -> List[str]:
+    seen = state["seen"] if state else {}
+    return [headline for headline in headlines if headline_key(headline) not in seen]
+
+
+def reusable_summary(headlines: str, topic: str) -> Optional[str]:
+    """The stored summary of a topic if none of headlines is new, else None."""
+    if not DELTA_SUMMARIES:
+        return None
+    state = load_state(topic)
+    if not state or not state["summary"]:
+        return None
+    if new_headlines(rank_headlines(headlines.split("\n"), topic), state):
+        return None
+    return state["summary"]
+
+
+async def async_summarize_delta(headlines: str, topic: str) -> str:
+    """
+    Summarize a topic's headlines, sending only what changed since last time.
+
+    Unchanged headlines reuse the previous summary without an LLM call; a
+    few new ones revise it; a mostly new page is summarized from scratch.
+
+    Args:
+        headlines: Newline separated headlines, as returned by extract_headlines
+        topic: Topic the headlines were scraped for
+
+    Returns:
+        str: News script for the topic
+    """
+    if not DELTA_SUMMARIES:
+        return await async_summarize_with_groq(headlines, topic)
+    # Identical concurrent refreshes share one summary; different headline
+    # sets for the topic take turns, since each revises the stored state.
+    digest = hashlib.sha256(headlines.encode("utf-8")).hexdigest()
+    return await delta_flights.do(
+        (topic_key(topic), digest), lambda: _summarize_delta(headlines, topic)
+    )
+
+
+async def _summarize_delta(headlines: str, topic: str) -> str:
+    lock_key = (id(asyncio.get_running_loop()), topic_key(topic))
+    lock = _topic_locks.get(lock_key)
+    if lock is None:
+        lock = _topic_locks[lock_key] = asyncio.Lock()
+    async with lock:
+        return await _revise_summary(headlines, topic)
+
+
+def _recent(first_seen: dict, now: float) -> dict:
+    # Forget headlines old enough that the state would have expired anyway
+    return {key: at for key, at in first_seen.items() if now - at < TOPIC_STATE_TTL}
+
+
+async def _revise_summary(headlines: str, topic: str) -> str:
+    state = await asyncio.to_thread(load_state, topic)
+    current = rank_headlines(headlines.split("\n"), topic)
+    fresh = new_headlines(current, state)
+
+    if state and state["summary"] and not fresh:
+        print(f"✅ No new headlines for '{topic}', reusing summary")
+        return state["summary"]
+
+    now = time.time()
+    seen = _recent(state["seen"] if state else {}, now)
+    pending = _recent(state.get("pending", {}) if state else {}, now)
+    # Headlines left over from an earlier prompt do not make the page "new"
+    unseen = [headline for headline in fresh if headline_key(headline) not in pending]
+    full = (
+        not state
+        or not state["summary"]
+        or state["updates"] >= DELTA_MAX_UPDATES
+        or len(unseen) > DELTA_FULL_RATIO * len(current)
+    )
+    # Trimmed here, as the prompt builders would, so only headlines that
+    # reach the LLM are marked as covered.
+    if full:
+        sent = fit_headlines(headlines, SUMMARY_INPUT_TOKENS, topic)
+        summary = await async_summarize_with_groq(sent, topic)
+        updates = 0
+    else:
+        sent = fit_headlines("\n".join(fresh), SUMMARY_INPUT_TOKENS, topic)
+        print(f"Updating summary for '{topic}' with {len(sent.splitlines())} new headlines")
+        summary = await async_update_summary_with_groq(state["summary"], sent, topic)
+        updates = state["updates"] + 1
+
+    for headline in sent.split("\n"):
+        key = headline_key(headline)
+        if key:
+            seen.setdefault(key, pending.pop(key, now))
+    for headline in current:
+        key = headline_key(headline)
+        if key not in seen:
+            pending.setdefault(key, now)
+    await asyncio.to_thread(
+        save_state,
+        topic,
+        {"summary": summary, "seen": seen, "pending": pending, "updates": updates},
+    )
+    return summary
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+from dotenv import load_dotenv
+
+from groq_client import aclose_async_groq_clients
+from http_client import http_client
+
+load_dotenv()
+
+
+PARSE_EXECUTOR = os.getenv("PARSE_EXECUTOR", "thread").lower()
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100")) / 1000
+LOOP_LAG_DEBUG = os.getenv("LOOP_LAG_DEBUG", "false").lower() == "true"
+
+_parse_executor: Optional[Executor] = None
+
+
+def get_parse_executor() -> Executor:
+    """Executor for CPU-bound parsing (PARSE_EXECUTOR=thread or process)."""
+    global _parse_executor
+    if _parse_executor is None:
+        if PARSE_EXECUTOR == "process":
+            _parse_executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+        else:
+            _parse_executor = ThreadPoolExecutor(
+                max_workers=PARSE_WORKERS, thread_name_prefix="parse"
+            )
+    return _parse_executor
+
+
+async def run_cpu_bound(fn: Callable, *args):
+    """Run a CPU-bound function off the event loop on the parse executor.
+
+    With the process executor fn and its arguments must be picklable, i.e.
+    module-level functions and plain data.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_parse_executor(), fn, *args)
+
+
+async def aclose_loop_clients():
+    """Close the HTTP and Groq clients bound to the running event loop."""
+    await http_client.aclose()
+    await aclose_async_groq_clients()
+
+
+def run_in_new_loop(coro: Awaitable):
+    """
+    Run a coroutine on a fresh event loop from synchronous code.
+
+    The loop's pooled clients are closed before the loop itself, so repeated
+    calls (one per Streamlit run) do not leak connections.
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        try:
+            loop.run_until_complete(aclose_loop_clients())
+        finally:
+            loop.close()
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop wakes up and report blocking calls.
+
+    A probe sleeps for interval seconds; any extra delay before it resumes is
+    time during which some callback held the loop. Lags above threshold are
+    logged. With LOOP_LAG_DEBUG=true asyncio debug mode is also enabled so
+    the offending callback is named in the log.
+    """
+
+    def __init__(self, interval: float = 0.5, threshold: float = LOOP_LAG_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.slow_ticks = 0
+        self.ticks = 0
+        self.started_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if LOOP_LAG_DEBUG:
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.threshold
+        self.started_at = time.time()
+        self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.ticks += 1
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.slow_ticks += 1
+                print(f"⚠️ Event loop blocked for {lag * 1000:.0f} ms")
+
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": round(self.threshold * 1000),
+            "last_lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "slow_ticks": self.slow_ticks,
+            "ticks": self.ticks,
+        }
+
+
+loop_monitor = LoopLagMonitor()
@@ -0,0 +1,156 @@
+import os
+import re
+from typing import List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from dedup import SOURCE_COUNT
+from prompt_budget import is_noise
+
+load_dotenv()
+
+
+# groq: abstractive Groq summaries, falling back to extractive when Groq is
+#       rate-limited or failing; extractive: always summarize locally
+SUMMARIZERS = ("groq", "extractive")
+SUMMARIZER = os.getenv("SUMMARIZER", "groq").lower()
+if SUMMARIZER not in SUMMARIZERS:
+    raise ValueError(f"SUMMARIZER must be one of {', '.join(SUMMARIZERS)}, got '{SUMMARIZER}'")
+EXTRACTIVE_SENTENCES = int(os.getenv("EXTRACTIVE_SENTENCES", "5"))
+# Use the extractive summary instead of queueing for Groq when the shared
+# rate limiter would make a summary wait longer than this many seconds.
+EXTRACTIVE_FALLBACK_WAIT = float(os.getenv("EXTRACTIVE_FALLBACK_WAIT", "10"))
+
+WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    """a an and are as at be but by for from has have he her his in is it its
+    of on or our she that the their they this to was were will with after
+    about over into new says said more than up out""".split()
+)
+# Candidates this similar to an already selected headline are skipped.
+REDUNDANCY = 0.6
+DAMPING = 0.85
+
+
+def _tokens(text: str) -> List[str]:
+    text = SOURCE_COUNT.sub("", text).lower()
+    return [word for word in WORD.findall(text) if word not in STOPWORDS]
+
+
+def _source_count(headline: str) -> int:
+    match = SOURCE_COUNT.search(headline)
+    return int(match.group(1)) if match else 1
+
+
+def tfidf_matrix(documents: List[List[str]]) -> np.ndarray:
+    """L2-normalized TF-IDF vectors (rows) for tokenized documents."""
+    vocabulary = {}
+    for tokens in documents:
+        for token in tokens:
+            vocabulary.setdefault(token, len(vocabulary))
+    counts = np.zeros((len(documents), max(len(vocabulary), 1)))
+    for row, tokens in enumerate(documents):
+        for token in tokens:
+            counts[row, vocabulary[token]] += 1
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+    vectors = counts * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def textrank(similarity: np.ndarray, iterations: int = 30) -> np.ndarray:
+    """PageRank over a sentence similarity graph, by power iteration."""
+    n = len(similarity)
+    weights = similarity.copy()
+    np.fill_diagonal(weights, 0)
+    totals = weights.sum(axis=1, keepdims=True)
+    transition = np.where(totals > 0, weights / np.where(totals == 0, 1, totals), 1 / n)
+    scores = np.full(n, 1 / n)
+    for _ in range(iterations):
+        scores = (1 - DAMPING) / n + DAMPING * transition.T @ scores
+    return scores
+
+
+def rank_sentences(
+    sentences: List[str], vectors: np.ndarray, topic: Optional[str] = None
+) -> List[int]:
+    """
+    Order sentences by importance: TextRank centrality plus similarity to the
+    TF-IDF centroid, boosted by topic relevance and source count.
+
+    Args:
+        sentences: Sentences to rank
+        vectors: Their TF-IDF vectors, from tfidf_matrix
+        topic: Optional topic used to prefer relevant sentences
+
+    Returns:
+        List[int]: Sentence indices, most important first
+    """
+    similarity = vectors @ vectors.T
+    centrality = textrank(similarity)
+    centroid = vectors.mean(axis=0)
+    centroid_score = vectors @ (centroid / (np.linalg.norm(centroid) or 1))
+
+    topic_terms = set(_tokens(topic or ""))
+    relevance = np.array(
+        [
+            len(topic_terms.intersection(_tokens(sentence))) / max(len(topic_terms), 1)
+            for sentence in sentences
+        ]
+    )
+    coverage = np.log1p([_source_count(sentence) for sentence in sentences])
+    # Results pages list the most relevant stories first.
+    position = 1 / (1 + np.arange(len(sentences)) / 10)
+
+    score = (
+        centrality / (centrality.max() or 1)
+        + centroid_score
+        + 0.5 * relevance
+        + 0.5 * coverage
+        + 0.25 * position
+    )
+    return [int(index) for index in np.argsort(-score, kind="stable")]
+
+
+def _spoken(headline: str) -> str:
+    sentence = SOURCE_COUNT.sub("", headline).strip().rstrip(" -|:")
+    return sentence if sentence.endswith((".", "!", "?")) else sentence + "."
+
+
+def extractive_summary(
+    headlines: str, topic: Optional[str] = None, max_sentences: int = EXTRACTIVE_SENTENCES
+) -> str:
+    """
+    Summarize headlines locally by selecting the most central ones.
+
+    Headlines are ranked with TF-IDF centroid and TextRank scores; the best
+    are kept, skipping near-repeats of ones already chosen, and read out as
+    a short digest in rank order.
+
+    Args:
+        headlines: Newline separated headlines, as returned by extract_headlines
+        topic: Optional topic used to prefer relevant headlines
+        max_sentences: Number of headlines in the digest
+
+    Returns:
+        str: TTS-ready digest, most important story first
+    """
+    sentences = [
+        line.strip() for line in headlines.split("\n") if line.strip() and not is_noise(line)
+    ]
+    if not sentences:
+        return ""
+
+    vectors = tfidf_matrix([_tokens(sentence) for sentence in sentences])
+    chosen: List[int] = []
+    for index in rank_sentences(sentences, vectors, topic):
+        if len(chosen) == max_sentences:
+            break
+        if chosen and float(np.max(vectors[chosen] @ vectors[index])) > REDUNDANCY:
+            continue
+        chosen.append(index)
+
+    lead = f"Here are the top stories on {topic}." if topic else "Here are the top stories."
+    return " ".join([lead] + [_spoken(sentences[index]) for index in chosen])
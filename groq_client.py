@@ -0,0 +1,70 @@
+import asyncio
+import os
+import threading
+import weakref
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+from groq import AsyncGroq, Groq
+
+load_dotenv()
+
+
+_lock = threading.Lock()
+_clients: Dict[str, Groq] = {}
+# Async clients per event loop, then per API key. Entries go away with their
+# loop; aclose_async_groq_clients() closes them before the loop is closed.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _resolve_key(api_key: Optional[str]) -> str:
+    return api_key or os.getenv("GROQ_API_KEY") or ""
+
+
+def get_groq_client(api_key: Optional[str] = None) -> Groq:
+    """
+    Return the process-wide Groq client for an API key, creating it once.
+
+    Args:
+        api_key: Groq API key. Defaults to the GROQ_API_KEY env var, which is
+            also where the Streamlit apps put a user's custom key.
+
+    Returns:
+        Groq: A client whose HTTP connection pool is reused across calls
+    """
+    key = _resolve_key(api_key)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = Groq(api_key=key or None)
+            _clients[key] = client
+        return client
+
+
+def get_async_groq_client(api_key: Optional[str] = None) -> AsyncGroq:
+    """
+    Async counterpart of get_groq_client for use inside the FastAPI handlers.
+
+    Async clients are bound to the event loop they were created on, so each
+    loop gets its own; clients of closed loops are dropped.
+    """
+    key = _resolve_key(api_key)
+    loop = asyncio.get_running_loop()
+    with _lock:
+        for other in [other for other in _async_clients if other.is_closed()]:
+            del _async_clients[other]
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = AsyncGroq(api_key=key or None)
+            clients[key] = client
+        return client
+
+
+async def aclose_async_groq_clients():
+    """Close the running loop's async clients; call before closing the loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.pop(loop, {})
+    for client in clients.values():
+        await client.close()
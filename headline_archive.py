@@ -0,0 +1,191 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from cache import CACHE_DIR
+from prompt_budget import rank_headlines
+
+load_dotenv()
+
+
+HEADLINE_ARCHIVE_DB = Path(
+    os.getenv("HEADLINE_ARCHIVE_DB", str(CACHE_DIR / "headlines.sqlite"))
+)
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_FLUSH_INTERVAL = float(os.getenv("ARCHIVE_FLUSH_INTERVAL", "2"))
+
+
+def headline_key(headline: str) -> str:
+    return " ".join(headline.lower().split())
+
+
+def fts_query(text: str) -> str:
+    """Quote each search term so user input cannot break FTS5 query syntax."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in text.split())
+
+
+class HeadlineArchive:
+    """Every scraped headline, with topic, source URL and first/last seen times.
+
+    Writes are buffered in memory and flushed in one transaction per batch
+    (every flush_interval seconds, or sooner once batch_size rows are
+    waiting) by a background thread, so scraping never waits on disk. The
+    thread starts with the first add() and the buffer is flushed once more
+    at interpreter exit. A full-text index (FTS5) over the headlines backs
+    keyword search.
+    """
+
+    def __init__(
+        self,
+        path=HEADLINE_ARCHIVE_DB,
+        batch_size: int = ARCHIVE_BATCH_SIZE,
+        flush_interval: float = ARCHIVE_FLUSH_INTERVAL,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: List[tuple] = []
+        self._pending_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), check_same_thread=False, timeout=30
+        )
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS headlines (
+                    id INTEGER PRIMARY KEY,
+                    topic TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    headline TEXT NOT NULL,
+                    url TEXT,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL,
+                    UNIQUE (topic, key)
+                );
+                CREATE INDEX IF NOT EXISTS headlines_topic_seen
+                    ON headlines (topic, first_seen);
+                CREATE VIRTUAL TABLE IF NOT EXISTS headlines_fts USING fts5(
+                    headline, content='headlines', content_rowid='id'
+                );
+                CREATE TRIGGER IF NOT EXISTS headlines_ai AFTER INSERT ON headlines BEGIN
+                    INSERT INTO headlines_fts (rowid, headline) VALUES (new.id, new.headline);
+                END;
+                CREATE TRIGGER IF NOT EXISTS headlines_ad AFTER DELETE ON headlines BEGIN
+                    INSERT INTO headlines_fts (headlines_fts, rowid, headline)
+                    VALUES ('delete', old.id, old.headline);
+                END;
+                """
+            )
+
+    def add(self, topic: str, url: Optional[str], headlines: List[str]):
+        """Queue a scrape's headlines for the next batch write (no disk I/O)."""
+        topic = headline_key(topic)
+        now = time.time()
+        rows = [
+            (topic, headline_key(headline), headline, url, now, now)
+            for headline in rank_headlines(headlines, topic)
+        ]
+        self.start_flusher()
+        with self._pending_lock:
+            self._pending.extend(rows)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Write all queued headlines in a single transaction."""
+        with self._pending_lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO headlines (topic, key, headline, url, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (topic, key) DO UPDATE SET
+                    last_seen = MAX(last_seen, excluded.last_seen),
+                    url = excluded.url
+                """,
+                rows,
+            )
+        return len(rows)
+
+    def start_flusher(self):
+        """Run flush() every flush_interval seconds, or when a batch fills up.
+
+        Safe to call repeatedly; only one flusher thread is started.
+        """
+        with self._pending_lock:
+            if self._flusher is not None:
+                return self._flusher
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="headline-archive", daemon=True
+            )
+        self._flusher.start()
+        atexit.register(self._safe_flush)
+        return self._flusher
+
+    def _safe_flush(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Headline archive flush failed: {str(e)}")
+
+    def _flush_loop(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._safe_flush()
+
+    def since(self, topic: str, since: float = 0.0, limit: int = 100) -> List[dict]:
+        """Headlines of a topic first seen at or after since, newest first."""
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT topic, headline, url, first_seen, last_seen FROM headlines
+                WHERE topic = ? AND first_seen >= ?
+                ORDER BY first_seen DESC, id DESC LIMIT ?
+                """,
+                (headline_key(topic), since, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def search(
+        self, query: str, topic: Optional[str] = None, limit: int = 50
+    ) -> List[dict]:
+        """Full-text keyword search, best matches first."""
+        self.flush()
+        match = fts_query(query)
+        if not match:
+            return []
+        sql = """
+            SELECT h.topic, h.headline, h.url, h.first_seen, h.last_seen
+            FROM headlines_fts JOIN headlines h ON h.id = headlines_fts.rowid
+            WHERE headlines_fts MATCH ?
+        """
+        params: list = [match]
+        if topic:
+            sql += " AND h.topic = ?"
+            params.append(headline_key(topic))
+        sql += " ORDER BY bm25(headlines_fts), h.last_seen DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+
+headline_archive = HeadlineArchive()
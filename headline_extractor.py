@@ -0,0 +1,285 @@
+import codecs
+import os
+import re
+from html.entities import html5
+from html.parser import HTMLParser
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# compat: streaming, output identical to clean_html + extract_headlines
+# fast:   streaming, character references decoded by html.parser itself
+# soup:   the original BeautifulSoup tree + extract_headlines path
+HEADLINE_EXTRACTOR = os.getenv("HEADLINE_EXTRACTOR", "compat").lower()
+HEADLINE_LIMIT = int(os.getenv("HEADLINE_LIMIT", "0"))
+SCRAPE_STREAMING = os.getenv("SCRAPE_STREAMING", "true").lower() == "true"
+SCRAPE_MAX_BYTES = int(float(os.getenv("SCRAPE_MAX_MB", "5")) * 1024 * 1024)
+
+# BeautifulSoup's get_text() leaves out strings inside these elements.
+HIDDEN_ELEMENTS = {"script", "style", "template"}
+# Elements BeautifulSoup's HTML builders treat as empty (never opened).
+VOID_ELEMENTS = {
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed",
+    "frame", "hr", "image", "img", "input", "isindex", "keygen", "link",
+    "menuitem", "meta", "nextid", "param", "source", "spacer", "track", "wbr",
+}
+# Named references as BeautifulSoup decodes them: the HTML5 names, with or
+# without the trailing semicolon.
+ENTITIES = {name.rstrip(";"): character for name, character in html5.items()}
+_DECIMAL_PREFIX = re.compile("^([0-9]+)(.*)")
+_HEX_PREFIX = re.compile("^([0-9a-f]+)(.*)")
+
+# Google News ends every story block with a "More" menu; the first line of
+# the block is the headline.
+BLOCK_END = "More"
+
+
+class _LimitReached(Exception):
+    pass
+
+
+def decode_charref(name: str) -> str:
+    """Decode a numeric character reference the way BeautifulSoup does.
+
+    Invalid code points become U+FFFD, C1 controls are read as Windows-1252
+    and digits run together with following text keep that text.
+
+    Args:
+        name: The reference without "&#" and ";", as html.parser reports it
+
+    Returns:
+        str: The character, followed by any trailing non-reference text
+    """
+    base, digits, prefix = 10, name, _DECIMAL_PREFIX
+    if name[:1] in ("x", "X"):
+        base, digits, prefix = 16, name[1:], _HEX_PREFIX
+    extra = ""
+    try:
+        number = int(digits, base)
+    except ValueError:
+        match = prefix.search(digits)
+        if match is None:
+            return digits
+        number, extra = int(match.group(1), base), match.group(2)
+
+    if number == 0 or number > 0x10FFFF or 0xD800 <= number <= 0xDFFF:
+        return "\ufffd" + extra
+    if 0x80 <= number <= 0x9F:
+        try:
+            return bytes([number]).decode("cp1252") + extra
+        except UnicodeDecodeError:
+            pass
+    return chr(number) + extra
+
+
+class HeadlineExtractor(HTMLParser):
+    """Event-driven headline extraction without building a document tree.
+
+    Text is split into lines as each text node ends and headlines are
+    emitted as soon as their block closes, so parsing stops the moment
+    limit headlines have been found. Feed the page in one piece or in
+    chunks as it downloads, then call close().
+    """
+
+    def __init__(self, limit: Optional[int] = None, compat: bool = True):
+        # In compat mode character references are decoded with
+        # BeautifulSoup's rules, which differ from html.unescape on
+        # malformed references.
+        super().__init__(convert_charrefs=not compat)
+        self.limit = limit or None
+        self.headlines: List[str] = []
+        self.done = False
+        self._text: List[str] = []
+        self._block_first: Optional[str] = None
+        # Names of the open elements, closed the way BeautifulSoup closes
+        # them, so hidden text ends where it would end in the tree.
+        self._open: List[str] = []
+        self._hidden = 0
+
+    def feed(self, data: str) -> bool:
+        """Parse more markup; returns True once the limit has been reached."""
+        if not self.done:
+            try:
+                super().feed(data)
+            except _LimitReached:
+                self.done = True
+        return self.done
+
+    def close(self) -> List[str]:
+        """Finish parsing and return the headlines found."""
+        if not self.done:
+            try:
+                super().close()
+                self._end_text()
+                if self._block_first is not None:
+                    self._emit(self._block_first)
+            except _LimitReached:
+                pass
+            self.done = True
+        return self.headlines
+
+    def _emit(self, headline: str):
+        self.headlines.append(headline)
+        self._block_first = None
+        if self.limit is not None and len(self.headlines) >= self.limit:
+            raise _LimitReached()
+
+    def _end_text(self):
+        if not self._text:
+            return
+        text = "".join(self._text)
+        self._text = []
+        for line in text.split("\n"):
+            line = line.strip()
+            if not line:
+                continue
+            if line == BLOCK_END:
+                if self._block_first is not None:
+                    self._emit(self._block_first)
+            elif self._block_first is None:
+                self._block_first = line
+
+    def handle_starttag(self, tag, attrs):
+        self._end_text()
+        if tag in VOID_ELEMENTS:
+            return
+        self._open.append(tag)
+        if tag in HIDDEN_ELEMENTS:
+            self._hidden += 1
+
+    def handle_endtag(self, tag):
+        self._end_text()
+        # An end tag closes the innermost open element of that name and
+        # everything inside it; a stray end tag is ignored.
+        if tag not in self._open:
+            return
+        while True:
+            name = self._open.pop()
+            if name in HIDDEN_ELEMENTS:
+                self._hidden -= 1
+            if name == tag:
+                break
+
+    def handle_startendtag(self, tag, attrs):
+        self._end_text()
+
+    def handle_data(self, data):
+        if not self._hidden:
+            self._text.append(data)
+
+    def handle_charref(self, name):
+        self.handle_data(decode_charref(name))
+
+    def handle_entityref(self, name):
+        character = ENTITIES.get(name)
+        self.handle_data(character if character is not None else f"&{name}")
+
+    # Comments, doctypes and processing instructions end the current text
+    # node but contribute no text.
+    def handle_comment(self, data):
+        self._end_text()
+
+    def handle_decl(self, decl):
+        self._end_text()
+
+    def unknown_decl(self, data):
+        self._end_text()
+        # CDATA sections are a text node of their own, even in hidden elements
+        if data.upper().startswith("CDATA["):
+            self._text.append(data[len("CDATA["):])
+            self._end_text()
+
+    def handle_pi(self, data):
+        self._end_text()
+
+
+def stream_headlines(
+    html_content: str, limit: Optional[int] = HEADLINE_LIMIT, compat: bool = True
+) -> str:
+    """
+    Extract headlines from a news page in a single streaming pass.
+
+    Args:
+        html_content: Raw page HTML
+        limit: Stop after this many headlines (0 or None for all)
+        compat: Decode character references exactly as BeautifulSoup does
+
+    Returns:
+        str: Headlines separated by newlines, as extract_headlines returns them
+    """
+    extractor = HeadlineExtractor(limit, compat)
+    extractor.feed(html_content)
+    return "\n".join(extractor.close())
+
+
+class StreamingPage:
+    """Collect a page as it downloads, with a size ceiling and early cutoff.
+
+    Each chunk is decoded incrementally and, when a headline limit is set,
+    fed to a HeadlineExtractor. add() returns True once the download can
+    stop: the limit has been reached or max_bytes have been read (the
+    rest of the page is dropped).
+    """
+
+    def __init__(
+        self,
+        encoding: Optional[str] = None,
+        max_bytes: int = SCRAPE_MAX_BYTES,
+        limit: Optional[int] = HEADLINE_LIMIT,
+        compat: bool = HEADLINE_EXTRACTOR != "fast",
+    ):
+        try:
+            decoder = codecs.getincrementaldecoder(encoding or "utf-8")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")
+        self._decoder = decoder(errors="replace")
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.truncated = False
+        # Without a limit there is nothing to stop early for, so the page is
+        # only parsed once, by html_to_headlines.
+        self.extractor = (
+            HeadlineExtractor(limit, compat)
+            if limit and HEADLINE_EXTRACTOR != "soup"
+            else None
+        )
+        self._parts: List[str] = []
+
+    def add(self, chunk: bytes) -> bool:
+        """Append a chunk; returns True when no more data is needed."""
+        room = self.max_bytes - self.bytes_read
+        if len(chunk) > room:
+            chunk = chunk[:room]
+            self.truncated = True
+        self.bytes_read += len(chunk)
+        text = self._decoder.decode(chunk)
+        self._parts.append(text)
+        if self.extractor is not None and self.extractor.feed(text):
+            return True
+        return self.truncated
+
+    def text(self) -> str:
+        """The downloaded part of the page."""
+        tail = self._decoder.decode(b"", final=True)
+        if tail:
+            self._parts.append(tail)
+            if self.extractor is not None:
+                self.extractor.feed(tail)
+        self._parts = ["".join(self._parts)]
+        return self._parts[0]
+
+    def headlines(self) -> Optional[str]:
+        """
+        Headlines parsed while downloading; call after text().
+
+        Returns:
+            Optional[str]: Newline separated headlines, as stream_headlines
+                returns them for the downloaded text, or None when the page
+                was not parsed during the download
+        """
+        if self.extractor is None:
+            return None
+        return "\n".join(self.extractor.close())
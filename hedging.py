@@ -0,0 +1,98 @@
+import os
+import threading
+from collections import defaultdict, deque
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+HEDGE_ENABLED = os.getenv("SCRAPE_HEDGE", "true").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("SCRAPE_HEDGE_PERCENTILE", "95"))
+HEDGE_DEFAULT_DELAY = float(os.getenv("SCRAPE_HEDGE_DELAY", "2"))
+HEDGE_BUDGET = float(os.getenv("SCRAPE_HEDGE_BUDGET", "0.1"))
+
+# Percentiles are not trusted until this many latencies have been observed.
+MIN_SAMPLES = 10
+
+
+class HedgePolicy:
+    """Decide when to fire a backup request and cap how often that happens.
+
+    The hedge delay for a method is the given percentile of its recent
+    successful latencies, so only the slowest calls get a backup. Every
+    request earns budget hedges (e.g. 0.1) and a hedge costs one, which
+    bounds backup traffic to that fraction of requests plus a small burst.
+    """
+
+    def __init__(
+        self,
+        percentile: float = HEDGE_PERCENTILE,
+        default_delay: float = HEDGE_DEFAULT_DELAY,
+        min_delay: float = 0.25,
+        max_delay: Optional[float] = None,
+        budget: float = HEDGE_BUDGET,
+        burst: float = 3.0,
+        window: int = 200,
+    ):
+        self.percentile = percentile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.burst = burst
+        self.credits = burst
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._latencies = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, latency: float):
+        with self._lock:
+            self._latencies[method].append(latency)
+
+    def delay(self, method: str) -> float:
+        """Seconds to wait for method before hedging."""
+        with self._lock:
+            samples = sorted(self._latencies[method])
+        if len(samples) < MIN_SAMPLES:
+            delay = self.default_delay
+        else:
+            index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+            delay = samples[index]
+        delay = max(self.min_delay, delay)
+        return min(delay, self.max_delay) if self.max_delay else delay
+
+    def earn(self):
+        """Credit the budget for one request."""
+        with self._lock:
+            self.requests += 1
+            self.credits = min(self.burst, self.credits + self.budget)
+
+    def can_hedge(self) -> bool:
+        with self._lock:
+            return self.credits >= 1
+
+    def spend(self):
+        with self._lock:
+            self.credits -= 1
+            self.hedges += 1
+
+    def record_win(self):
+        with self._lock:
+            self.hedge_wins += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            methods = list(self._latencies)
+            stats = {
+                "enabled": HEDGE_ENABLED,
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "credits": round(self.credits, 2),
+            }
+        stats["delay_s"] = {method: round(self.delay(method), 3) for method in methods}
+        return stats
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "6"))
+KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+
+class AsyncHTTPClient:
+    """Shared keep-alive connection pool with a per-host connection cap.
+
+    One pool is kept per event loop, so callers that spin up their own loops
+    (the Streamlit apps) never reuse connections bound to a closed loop.
+    Call aclose() before closing such a loop to release its connections.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST,
+        keepalive_expiry: float = KEEPALIVE_EXPIRY,
+    ):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_expiry = keepalive_expiry
+        # Per loop: the client and its per-host connection slots
+        self._pools = weakref.WeakKeyDictionary()
+
+    def _get_pool(self) -> Tuple[httpx.AsyncClient, Dict[str, asyncio.Semaphore]]:
+        loop = asyncio.get_running_loop()
+        for other in [other for other in self._pools if other.is_closed()]:
+            del self._pools[other]
+        pool = self._pools.get(loop)
+        if pool is None or pool[0].is_closed:
+            client = httpx.AsyncClient(
+                headers=DEFAULT_HEADERS,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                follow_redirects=True,
+            )
+            pool = self._pools[loop] = (client, {})
+        return pool
+
+    def _get_client(self) -> httpx.AsyncClient:
+        return self._get_pool()[0]
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        slots = self._get_pool()[1]
+        if host not in slots:
+            slots[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return slots[host]
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        client = self._get_client()
+        async with self._host_slot(url):
+            return await client.request(method, url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Send a request and yield the response before its body is read."""
+        client = self._get_client()
+        async with self._host_slot(url):
+            async with client.stream(method, url, **kwargs) as response:
+                yield response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        """Close the running loop's connection pool."""
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None and not pool[0].is_closed:
+            await pool[0].aclose()
+
+
+http_client = AsyncHTTPClient()
@@ -0,0 +1,253 @@
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional
+
+from dotenv import load_dotenv
+
+from cache import CACHE_DIR
+from models import NewsRequest
+from pipeline import planned_stages
+
+load_dotenv()
+
+
+JOBS_DB = Path(os.getenv("JOBS_DB", str(CACHE_DIR / "jobs.sqlite")))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = 2.0
+
+# Identifies the process running a job, so a restart only requeues jobs whose
+# worker is gone and not jobs that another uvicorn worker is still running.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owner_alive(owner: Optional[str]) -> bool:
+    if not owner:
+        return False
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname():
+        # Cannot check another machine's processes; assume it is still working.
+        return True
+    if int(pid) == os.getpid():
+        # Our own pid from a previous run (e.g. pid 1 in a restarted container).
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobQueue:
+    """Briefing jobs persisted in SQLite so queued work survives a restart.
+
+    A job moves queued -> running -> done | failed, and records the status of
+    each pipeline stage (pending, running, done) for progress reporting.
+    """
+
+    def __init__(self, path=JOBS_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), check_same_thread=False, timeout=30
+        )
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    request TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stages TEXT NOT NULL,
+                    audio_path TEXT,
+                    error TEXT,
+                    owner TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)"
+            )
+
+    def submit(self, request: NewsRequest) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        stages = {stage: "pending" for stage in planned_stages(request)}
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, request, status, stages, created_at, updated_at)"
+                " VALUES (?, ?, 'queued', ?, ?, ?)",
+                (job_id, request.model_dump_json(), json.dumps(stages), now, now),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        stages = json.loads(row["stages"])
+        done = sum(1 for status in stages.values() if status == "done")
+        return {
+            "job_id": row["id"],
+            "status": row["status"],
+            "request": json.loads(row["request"]),
+            "stages": stages,
+            "progress": round(done / len(stages), 2) if stages else 0.0,
+            "audio_path": row["audio_path"],
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    def claim_next(self) -> Optional[tuple]:
+        """Atomically move the oldest queued job to running; returns (id, request).
+
+        Other processes may share the database, so the UPDATE only succeeds
+        while the job is still queued; a job claimed elsewhere in between is
+        skipped and the next one tried.
+        """
+        while True:
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    "SELECT id, request FROM jobs WHERE status = 'queued'"
+                    " ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    return None
+                claimed = self._conn.execute(
+                    "UPDATE jobs SET status = 'running', owner = ?, updated_at = ?"
+                    " WHERE id = ? AND status = 'queued'",
+                    (WORKER_ID, time.time(), row["id"]),
+                ).rowcount
+            if claimed:
+                return row["id"], NewsRequest.model_validate_json(row["request"])
+
+    def set_stage(self, job_id: str, stage: str, status: str):
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT stages FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return
+            stages = json.loads(row["stages"])
+            stages[stage] = status
+            self._conn.execute(
+                "UPDATE jobs SET stages = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(stages), time.time(), job_id),
+            )
+
+    def finish(self, job_id: str, audio_path: str):
+        self._update(job_id, status="done", audio_path=audio_path)
+
+    def fail(self, job_id: str, error: str):
+        self._update(job_id, status="failed", error=error)
+
+    def requeue_interrupted(self) -> int:
+        """Put jobs left running by a process that no longer exists back on the queue."""
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT id, owner FROM jobs WHERE status = 'running'"
+            ).fetchall()
+            orphans = [(row["id"],) for row in rows if not _owner_alive(row["owner"])]
+            self._conn.executemany(
+                "UPDATE jobs SET status = 'queued', owner = NULL WHERE id = ?",
+                orphans,
+            )
+        return len(orphans)
+
+    def _update(self, job_id: str, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {columns} WHERE id = ?",
+                (*fields.values(), job_id),
+            )
+
+
+class JobWorkerPool:
+    """Bounded set of asyncio workers that drain a JobQueue."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        run: Callable[..., Awaitable[str]],
+        workers: int = JOB_WORKERS,
+    ):
+        self.queue = queue
+        self.run = run
+        self.workers = workers
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        requeued = self.queue.requeue_interrupted()
+        if requeued:
+            print(f"Requeued {requeued} interrupted job(s)")
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle workers after a job has been submitted."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _worker(self):
+        while True:
+            self._wakeup.clear()
+            claimed = await asyncio.to_thread(self.queue.claim_next)
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job_id, request = claimed
+            print(f"Running job {job_id}: topics={request.topics}")
+            try:
+                # Queue writes can wait on SQLite's busy timeout under
+                # contention, so they run in a thread.
+                audio_path = await self.run(
+                    request,
+                    on_stage=lambda stage, status: asyncio.to_thread(
+                        self.queue.set_stage, job_id, stage, status
+                    ),
+                )
+                await asyncio.to_thread(self.queue.finish, job_id, audio_path)
+            except asyncio.CancelledError:
+                # Left as running; requeued on the next start.
+                raise
+            except Exception as e:
+                error = getattr(e, "detail", None) or str(e)
+                print(f"Job {job_id} failed: {error}")
+                await asyncio.to_thread(self.queue.fail, job_id, error)
+
+
+job_queue = JobQueue()
@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+from cache import CACHE_DIR, DiskCache
+from rate_limiter import async_limited_create, limited_create
+from singleflight import AsyncSingleFlight, SingleFlight
+
+load_dotenv()
+
+
+# Seconds a cached completion stays valid, per call site. Override any of
+# them with LLM_CACHE_TTL_<CALL_SITE>, e.g. LLM_CACHE_TTL_SOCIAL_SENTIMENT=600.
+DEFAULT_TTLS = {
+    "summarize": 3600,
+    "summary_update": 3600,
+    "news_script": 3600,
+    "broadcast": 3600,
+    "mock_news": 1800,
+    "social_sentiment": 1800,
+}
+
+
+def call_site_ttl(call_site: str) -> float:
+    default = DEFAULT_TTLS.get(call_site, 3600)
+    return float(os.getenv(f"LLM_CACHE_TTL_{call_site.upper()}", default))
+
+
+class LLMCache:
+    """Two-tier cache for chat completions: in-memory LRU over a DiskCache.
+
+    Entries are content-addressed by (model, messages, temperature,
+    max_tokens), so byte-identical prompts from any call site share a result.
+    """
+
+    def __init__(self, disk: DiskCache, memory_size: int = 256):
+        self.disk = disk
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        )
+
+    @staticmethod
+    def make_key(
+        model: str, messages: List[dict], temperature: float, max_tokens: int
+    ) -> str:
+        payload = json.dumps(
+            {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, call_site: str, key: str) -> Optional[str]:
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None and hit[1] > time.time():
+                self._memory.move_to_end(key)
+                self._stats[call_site]["memory_hits"] += 1
+                return hit[0]
+
+        entry = self.disk.get(key)
+        with self._lock:
+            if entry is None:
+                self._stats[call_site]["misses"] += 1
+                return None
+            self._stats[call_site]["disk_hits"] += 1
+            text = entry.value.decode("utf-8")
+            self._remember(key, text, entry.expires_at)
+            return text
+
+    def set(self, call_site: str, key: str, text: str):
+        ttl = call_site_ttl(call_site)
+        self.disk.set(key, text.encode("utf-8"), {"call_site": call_site}, ttl=ttl)
+        with self._lock:
+            self._remember(key, text, time.time() + ttl)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {site: dict(counts) for site, counts in self._stats.items()}
+
+    def _remember(self, key: str, text: str, expires_at: float):
+        self._memory[key] = (text, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+
+llm_cache = LLMCache(
+    DiskCache(
+        CACHE_DIR / "llm.sqlite",
+        max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "50")) * 1024 * 1024),
+    ),
+    memory_size=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256")),
+)
+
+completion_flights = SingleFlight()
+async_completion_flights = AsyncSingleFlight()
+
+
+def cached_completion(
+    call_site: str,
+    client,
+    model: str,
+    messages: List[dict],
+    temperature: float,
+    max_tokens: int,
+) -> str:
+    """
+    Return a chat completion's text, served from llm_cache when possible.
+
+    Args:
+        call_site: Name of the caller, used for TTL lookup and hit/miss stats
+        client: Groq client used on a cache miss
+        model, messages, temperature, max_tokens: Completion parameters
+
+    Returns:
+        str: The completion message content
+    """
+    key = LLMCache.make_key(model, messages, temperature, max_tokens)
+    cached = llm_cache.get(call_site, key)
+    if cached is not None:
+        return cached
+
+    def complete() -> str:
+        response = limited_create(
+            client,
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=False,
+        )
+        text = response.choices[0].message.content
+        if text:
+            llm_cache.set(call_site, key, text)
+        return text
+
+    # Identical prompts already in flight share one completion
+    return completion_flights.do(key, complete)
+
+
+async def async_cached_completion(
+    call_site: str,
+    client,
+    model: str,
+    messages: List[dict],
+    temperature: float,
+    max_tokens: int,
+) -> str:
+    """
+    Async counterpart of cached_completion for an AsyncGroq client.
+
+    Cache reads and writes run in a worker thread and the completion is
+    awaited, so the event loop is never blocked.
+    """
+    key = LLMCache.make_key(model, messages, temperature, max_tokens)
+    cached = await asyncio.to_thread(llm_cache.get, call_site, key)
+    if cached is not None:
+        return cached
+
+    async def complete() -> str:
+        response = await async_limited_create(
+            client,
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=False,
+        )
+        text = response.choices[0].message.content
+        if text:
+            await asyncio.to_thread(llm_cache.set, call_site, key, text)
+        return text
+
+    return await async_completion_flights.do(key, complete)
+
+
+def cached_completion_stream(
+    call_site: str,
+    client,
+    model: str,
+    messages: List[dict],
+    temperature: float,
+    max_tokens: int,
+) -> Iterator[str]:
+    """
+    Streaming counterpart of cached_completion that yields text deltas.
+
+    A cache hit yields the whole stored text at once; on a miss the completion
+    is requested with stream=True and the joined text is cached at the end.
+    """
+    key = LLMCache.make_key(model, messages, temperature, max_tokens)
+    cached = llm_cache.get(call_site, key)
+    if cached is not None:
+        yield cached
+        return
+
+    stream = limited_create(
+        client,
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True,
+    )
+    parts = []
+    for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            parts.append(delta)
+            yield delta
+
+    text = "".join(parts)
+    if text:
+        llm_cache.set(call_site, key, text)
@@ -1,7 +1,9 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Literal, Optional
 
 
 class NewsRequest(BaseModel):
     topics: List[str]
     source_type: str
+    # groq or extractive; None uses the SUMMARIZER env var
+    summarizer: Optional[Literal["groq", "extractive"]] = None
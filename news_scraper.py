@@ -1,5 +1,6 @@
 import asyncio
-from typing import Dict, List
+import os
+from typing import Dict, List, Optional
 
 from aiolimiter import AsyncLimiter
 from tenacity import (
@@ -10,12 +11,22 @@ from tenacity import (
 
 from dotenv import load_dotenv
 
+from dedup import DEDUP_HEADLINES, dedupe_topics
+from delta_summary import async_summarize_delta, reusable_summary
+from event_loop import run_cpu_bound
+from extractive import (
+    EXTRACTIVE_FALLBACK_WAIT,
+    SUMMARIZER,
+    SUMMARIZERS,
+    extractive_summary,
+)
+from headline_archive import headline_archive
+from prompt_budget import SUMMARY_INPUT_TOKENS, count_tokens
+from rate_limiter import groq_limiter
 from utils import (
     generate_news_urls_to_scrape,
-    scrape_with_brightdata,
-    clean_html,
-    extract_headlines,
-    summarize_with_groq,
+    async_scrape_page,
+    html_to_headlines,
 )
 
 load_dotenv()
@@ -24,27 +35,114 @@ load_dotenv()
 class NewsScraper:
     _rate_limiter = AsyncLimiter(5, 1)
 
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        refresh: bool = False,
+        summarizer: Optional[str] = None,
+    ):
+        """
+        Args:
+            max_concurrency: Maximum number of topics processed at the same time.
+                Defaults to the NEWS_MAX_CONCURRENCY env var (4). Use 1 to
+                process topics one after another.
+            refresh: Re-fetch pages even when the page cache is still fresh.
+            summarizer: "groq" or "extractive"; defaults to the SUMMARIZER env
+                var. Groq summaries fall back to extractive ones when Groq is
+                rate-limited or failing.
+        """
+        self.max_concurrency = max(
+            1, max_concurrency or int(os.getenv("NEWS_MAX_CONCURRENCY", "4"))
+        )
+        self.refresh = refresh
+        self.summarizer = (summarizer or SUMMARIZER).lower()
+        if self.summarizer not in SUMMARIZERS:
+            raise ValueError(
+                f"summarizer must be one of {', '.join(SUMMARIZERS)}, got '{summarizer}'"
+            )
+
     @retry(
         stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10)
     )
     async def scrape_news(self, topics: List[str]) -> Dict[str, str]:
-        """Scrape and Analyze news articles based on provided topics."""
-        results = {}
+        """Scrape and Analyze news articles based on provided topics.
 
-        for topic in topics:
-            async with self._rate_limiter:
-                try:
-                    urls = generate_news_urls_to_scrape([topic])
-                    search_html = scrape_with_brightdata(urls[topic])
-                    clean_text = clean_html(search_html)
-                    headlines = extract_headlines(clean_text)
+        Each topic is fetched and its headlines extracted as a separate task,
+        bounded by max_concurrency. Near-duplicate headlines are then collapsed
+        within and across topics before each topic is summarized. Results keep
+        the topic order.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        urls = generate_news_urls_to_scrape(topics)
 
-                    summary = summarize_with_groq(headlines)
+        async def fetch_topic(topic: str) -> str:
+            async with semaphore:
+                # The limiter only paces task start-up; the slot is not held
+                # while the topic is being fetched.
+                async with self._rate_limiter:
+                    pass
+                return await self._fetch_headlines(topic, urls[topic])
 
-                    results[topic] = summary
+        async def summarize_topic(topic: str, headlines) -> str:
+            if isinstance(headlines, Exception):
+                return f"Error: {str(headlines)}"
+            async with semaphore:
+                try:
+                    return await self._summarize(topic, headlines)
                 except Exception as e:
-                    results[topic] = f"Error: {str(e)}"
+                    return f"Error: {str(e)}"
+
+        fetched = await asyncio.gather(
+            *(fetch_topic(topic) for topic in topics), return_exceptions=True
+        )
+        if DEDUP_HEADLINES:
+            found = {
+                topic: headlines
+                for topic, headlines in zip(topics, fetched)
+                if not isinstance(headlines, Exception)
+            }
+            deduped = await run_cpu_bound(dedupe_topics, found)
+            fetched = [
+                deduped.get(topic, headlines) for topic, headlines in zip(topics, fetched)
+            ]
+
+        summaries = await asyncio.gather(
+            *(summarize_topic(topic, headlines) for topic, headlines in zip(topics, fetched))
+        )
+
+        return {"news_analysis": dict(zip(topics, summaries))}
+
+    async def _fetch_headlines(self, topic: str, url: str) -> str:
+        """Scrape a topic URL, archive its headlines and return them.
+
+        Mock content used when every fetch failed is not archived, since it
+        is not what the URL actually showed.
+        """
+        page = await async_scrape_page(url, refresh=self.refresh)
+        headlines = page.headlines
+        if headlines is None:
+            headlines = await run_cpu_bound(html_to_headlines, page.html)
+        if not page.fallback:
+            headline_archive.add(topic, url, headlines.split("\n"))
+        return headlines
+
+    async def _summarize(self, topic: str, headlines: str) -> str:
+        """Summarize a topic's headlines with Groq or the local extractive engine."""
+        if self.summarizer == "extractive":
+            return await run_cpu_bound(extractive_summary, headlines, topic)
 
-                await asyncio.sleep(1)
+        # Prompt (capped by fit_headlines) plus the summary's max_tokens
+        estimate = min(count_tokens(headlines), SUMMARY_INPUT_TOKENS) + 800
+        wait = await asyncio.to_thread(groq_limiter.expected_wait, estimate)
+        if wait > EXTRACTIVE_FALLBACK_WAIT:
+            reused = await asyncio.to_thread(reusable_summary, headlines, topic)
+            if reused is not None:
+                return reused
+            print(f"Groq is rate-limited ({wait:.0f}s wait), summarizing '{topic}' locally")
+            return await run_cpu_bound(extractive_summary, headlines, topic)
 
-        return {"news_analysis": results}
+        try:
+            return await async_summarize_delta(headlines, topic)
+        except Exception as e:
+            print(f"Groq summary of '{topic}' failed ({str(e)}), summarizing locally")
+            return await run_cpu_bound(extractive_summary, headlines, topic)
@@ -0,0 +1,171 @@
+import asyncio
+import inspect
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from extractive import SUMMARIZER
+from models import NewsRequest
+from news_scraper import NewsScraper
+from social_analyzer import analyze_social_discussions
+from utils import async_generate_broadcast_news_with_groq, tts_to_audio
+
+
+# Stages of a briefing, in execution order. The news and social stages only
+# run when the request's source_type asks for them.
+STAGES = ("news", "social", "broadcast", "audio")
+
+# May be a coroutine function, so a callback can do its I/O off the event loop.
+StageCallback = Callable[[str, str], Optional[Awaitable[None]]]
+
+
+def wants_news(request: NewsRequest) -> bool:
+    return request.source_type.lower() in ["news", "both"]
+
+
+def wants_social(request: NewsRequest) -> bool:
+    return request.source_type.lower() in ["reddit", "social", "both"]
+
+
+def planned_stages(request: NewsRequest) -> List[str]:
+    """List the stages a request will go through."""
+    skipped = set()
+    if not wants_news(request):
+        skipped.add("news")
+    if not wants_social(request):
+        skipped.add("social")
+    return [stage for stage in STAGES if stage not in skipped]
+
+
+def briefing_key(request: NewsRequest) -> tuple:
+    """Normalized identity of a briefing; identical keys produce identical audio."""
+    topics = tuple(" ".join(topic.lower().split()) for topic in request.topics)
+    return topics, request.source_type.lower(), request.summarizer or SUMMARIZER
+
+
+async def _report(on_stage: Optional[StageCallback], stage: str, status: str):
+    if on_stage is not None:
+        result = on_stage(stage, status)
+        if inspect.isawaitable(result):
+            await result
+
+
+@dataclass
+class Stage:
+    """A pipeline step that runs once all stages named in deps have finished."""
+
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    deps: Tuple[str, ...] = ()
+
+
+async def run_stages(
+    stages: List[Stage], on_stage: StageCallback = None
+) -> Dict[str, Any]:
+    """
+    Run a dependency graph of stages with maximum concurrency.
+
+    Every stage starts as its own task and waits only for its own
+    dependencies, so independent stages overlap and a downstream stage begins
+    the moment its inputs are ready. Stages must be listed after their deps.
+
+    Returns:
+        Dict[str, Any]: Result of each stage by name
+    """
+    results: Dict[str, Any] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(stage: Stage):
+        await asyncio.gather(*(tasks[dep] for dep in stage.deps))
+        await _report(on_stage, stage.name, "running")
+        results[stage.name] = await stage.run(results)
+        await _report(on_stage, stage.name, "done")
+
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in tasks]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown {missing}")
+        tasks[stage.name] = asyncio.ensure_future(run(stage))
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+    return results
+
+
+def source_stages(request: NewsRequest) -> List[Stage]:
+    """Independent news and social stages requested by source_type."""
+
+    async def news(_):
+        print("Processing news...")
+        news_data = await NewsScraper(summarizer=request.summarizer).scrape_news(
+            request.topics
+        )
+        print(f"News results: {len(news_data.get('news_analysis', {}))} topics")
+        return news_data
+
+    async def social(_):
+        print("Processing social media...")
+        social_data = await analyze_social_discussions(request.topics)
+        print(f"Social results: {len(social_data.get('social_analysis', {}))} topics")
+        return social_data
+
+    stages = []
+    if wants_news(request):
+        stages.append(Stage("news", news))
+    if wants_social(request):
+        stages.append(Stage("social", social))
+    return stages
+
+
+async def collect_sources(request: NewsRequest, on_stage: StageCallback = None):
+    """Gather the news and social media inputs for a request's topics concurrently."""
+    results = await run_stages(source_stages(request), on_stage)
+    return results.get("news", {}), results.get("social", {})
+
+
+async def build_briefing(request: NewsRequest, on_stage: StageCallback = None) -> str:
+    """
+    Run the full scrape -> summarize -> broadcast -> TTS graph for a request.
+
+    News and social run concurrently; the broadcast starts as soon as both
+    are available and the audio as soon as the script is ready.
+
+    Args:
+        request: Topics and source type to cover
+        on_stage: Optional callback receiving (stage, status) updates
+
+    Returns:
+        str: Path of the rendered audio file
+    """
+    sources = source_stages(request)
+
+    async def broadcast(results):
+        # Use Groq instead of Ollama for faster processing
+        print("Generating broadcast news...")
+        news_summary = await async_generate_broadcast_news_with_groq(
+            results.get("news", {}), results.get("social", {}), request.topics
+        )
+        print(f"Generated summary length: {len(news_summary) if news_summary else 0}")
+        return news_summary
+
+    async def audio(results):
+        # Use free gTTS instead of ElevenLabs
+        print("Converting to audio...")
+        audio_path = await asyncio.to_thread(
+            tts_to_audio, text=results["broadcast"], language="en"
+        )
+        print(f"Audio path: {audio_path}")
+        return audio_path
+
+    results = await run_stages(
+        sources
+        + [
+            Stage("broadcast", broadcast, tuple(stage.name for stage in sources)),
+            Stage("audio", audio, ("broadcast",)),
+        ],
+        on_stage,
+    )
+    return results["audio"]
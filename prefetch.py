@@ -0,0 +1,199 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from models import NewsRequest
+from news_scraper import NewsScraper
+from pipeline import build_briefing
+
+load_dotenv()
+
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+PREFETCH_INTERVAL = float(os.getenv("PREFETCH_INTERVAL", "300"))
+PREFETCH_TOP_N = int(os.getenv("PREFETCH_TOP_N", "5"))
+PREFETCH_MIN_SCORE = float(os.getenv("PREFETCH_MIN_SCORE", "2"))
+PREFETCH_HALF_LIFE = float(os.getenv("PREFETCH_HALF_LIFE_HOURS", "6")) * 3600
+PREFETCH_AUDIO = os.getenv("PREFETCH_AUDIO", "false").lower() == "true"
+PREFETCH_SEED_TOPICS = [
+    topic.strip()
+    for topic in os.getenv("PREFETCH_SEED_TOPICS", "").split(",")
+    if topic.strip()
+]
+
+MAX_TRACKED_TOPICS = 1000
+
+
+def normalize_topic(topic: str) -> str:
+    return " ".join(topic.lower().split())
+
+
+class TopicPopularity:
+    """Exponentially decayed request counts per topic.
+
+    Each request adds 1 to a topic's score and scores halve every half_life
+    seconds, so the ranking follows what is popular now rather than ever.
+    The most common spelling and source type are kept for warming.
+    """
+
+    def __init__(self, half_life: float = PREFETCH_HALF_LIFE):
+        self.half_life = half_life
+        self._topics: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _decayed(self, entry: dict, now: float) -> float:
+        return entry["score"] * math.pow(0.5, (now - entry["updated_at"]) / self.half_life)
+
+    def record(self, request: NewsRequest, weight: float = 1.0):
+        """Count a request towards the popularity of each of its topics."""
+        now = time.time()
+        with self._lock:
+            for topic in request.topics:
+                key = normalize_topic(topic)
+                if not key:
+                    continue
+                entry = self._topics.setdefault(
+                    key,
+                    {"score": 0.0, "updated_at": now, "spellings": Counter(), "sources": Counter()},
+                )
+                entry["score"] = self._decayed(entry, now) + weight
+                entry["updated_at"] = now
+                entry["spellings"][topic.strip()] += 1
+                entry["sources"][request.source_type.lower()] += 1
+            if len(self._topics) > MAX_TRACKED_TOPICS:
+                self._prune(now)
+
+    def _prune(self, now: float):
+        ranked = sorted(self._topics, key=lambda key: self._decayed(self._topics[key], now))
+        for key in ranked[: len(ranked) - MAX_TRACKED_TOPICS]:
+            del self._topics[key]
+
+    def top(self, n: int, min_score: float = 0.0) -> List[Tuple[str, str, float]]:
+        """
+        Most popular topics right now.
+
+        Returns:
+            List[Tuple[str, str, float]]: (topic spelling, source_type, score),
+                most popular first
+        """
+        now = time.time()
+        with self._lock:
+            ranked = [
+                (
+                    entry["spellings"].most_common(1)[0][0],
+                    entry["sources"].most_common(1)[0][0],
+                    self._decayed(entry, now),
+                )
+                for entry in self._topics.values()
+            ]
+        ranked = [item for item in ranked if item[2] >= min_score]
+        ranked.sort(key=lambda item: -item[2])
+        return ranked[:n]
+
+
+async def warm_topic(topic: str, source_type: str, audio: bool = PREFETCH_AUDIO):
+    """
+    Refresh the cached scrape and summary of a topic, optionally its audio.
+
+    The refreshed page and summary land in page_cache and llm_cache, so a
+    user request for the topic is answered from cache. With audio the whole
+    single-topic briefing is rendered into the audio store as well.
+    """
+    await NewsScraper(refresh=True).scrape_news([topic])
+    if audio:
+        await build_briefing(NewsRequest(topics=[topic], source_type=source_type))
+
+
+class PrefetchScheduler:
+    """Periodically warm the most requested topics in the background.
+
+    Seed topics are warmed on every run on top of the top_n popular ones,
+    whatever their request count.
+    """
+
+    def __init__(
+        self,
+        popularity: TopicPopularity,
+        interval: float = PREFETCH_INTERVAL,
+        top_n: int = PREFETCH_TOP_N,
+        min_score: float = PREFETCH_MIN_SCORE,
+        seed_topics: Optional[List[str]] = None,
+    ):
+        self.popularity = popularity
+        self.interval = interval
+        self.top_n = top_n
+        self.min_score = min_score
+        self.seed_topics = PREFETCH_SEED_TOPICS if seed_topics is None else seed_topics
+        self.runs = 0
+        self.warmed = 0
+        self.failures = 0
+        self.last_run: Optional[float] = None
+        self.last_topics: List[str] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if not PREFETCH_ENABLED:
+            return
+        self._task = asyncio.create_task(self._run(), name="prefetch-scheduler")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
+
+    def warm_set(self) -> List[Tuple[str, str, float]]:
+        """The popular topics followed by any seed topics not among them."""
+        topics = self.popularity.top(self.top_n, self.min_score)
+        chosen = {normalize_topic(topic) for topic, _, _ in topics}
+        for topic in self.seed_topics:
+            if normalize_topic(topic) not in chosen:
+                chosen.add(normalize_topic(topic))
+                topics.append((topic, "news", 0.0))
+        return topics
+
+    async def run_once(self):
+        """Warm the current top topics and the seed topics one after another."""
+        topics = self.warm_set()
+        self.last_topics = [topic for topic, _, _ in topics]
+        for topic, source_type, score in topics:
+            try:
+                print(f"Prefetching '{topic}' (score {score:.1f})")
+                await warm_topic(topic, source_type)
+                self.warmed += 1
+            except Exception as e:
+                self.failures += 1
+                print(f"Prefetch of '{topic}' failed: {str(e)}")
+        self.runs += 1
+        self.last_run = time.time()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": PREFETCH_ENABLED,
+            "interval_s": self.interval,
+            "runs": self.runs,
+            "warmed": self.warmed,
+            "failures": self.failures,
+            "last_run": self.last_run,
+            "last_topics": self.last_topics,
+            "seed_topics": self.seed_topics,
+            "top": [
+                {"topic": topic, "source_type": source_type, "score": round(score, 2)}
+                for topic, source_type, score in self.popularity.top(self.top_n)
+            ],
+        }
+
+
+topic_popularity = TopicPopularity()
+prefetch_scheduler = PrefetchScheduler(topic_popularity)
@@ -0,0 +1,123 @@
+import math
+import os
+import re
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+SUMMARY_INPUT_TOKENS = int(os.getenv("SUMMARY_INPUT_TOKENS", "1500"))
+BROADCAST_INPUT_TOKENS = int(os.getenv("BROADCAST_INPUT_TOKENS", "3000"))
+
+# Calibrated against Gemma's SentencePiece tokenizer on English news text:
+# about 4 characters or 0.75 words per token. The larger of the two
+# estimates is used so numbers, names and punctuation are not undercounted.
+CHARS_PER_TOKEN = 4.0
+TOKENS_PER_WORD = 1.33
+
+WORD = re.compile(r"\w+")
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+# Navigation and metadata lines that appear on Google News result pages.
+_NOISE = re.compile(
+    r"^(home|for you|following|news showcase|sign in|more|full coverage|"
+    r"top stories|\d+\s+(second|minute|hour|day|week|month)s?\s+ago|yesterday)$",
+    re.IGNORECASE,
+)
+
+
+def is_noise(line: str) -> bool:
+    """Whether a line is page navigation or metadata rather than a headline."""
+    return bool(_NOISE.match(line.strip()))
+
+
+def count_tokens(text: str) -> int:
+    """Estimate the number of model tokens in text."""
+    if not text:
+        return 0
+    by_chars = len(text) / CHARS_PER_TOKEN
+    by_words = len(WORD.findall(text)) * TOKENS_PER_WORD
+    return math.ceil(max(by_chars, by_words))
+
+
+def _headline_score(headline: str, position: int, topic_terms: set) -> float:
+    words = [w.lower() for w in WORD.findall(headline)]
+    if not words:
+        return float("-inf")
+    relevance = len(topic_terms.intersection(words)) / max(len(topic_terms), 1)
+    # Real headlines are roughly 6-20 words; shorter lines are usually
+    # source names or section labels.
+    shape = 1.0 if 6 <= len(words) <= 20 else 0.4 if len(words) >= 4 else 0.0
+    # Result pages list the freshest and most relevant stories first.
+    recency = 1.0 / (1.0 + position / 10.0)
+    return 2.0 * relevance + shape + recency
+
+
+def rank_headlines(headlines: List[str], topic: Optional[str] = None) -> List[str]:
+    """Drop duplicates and page noise, and order headlines by estimated importance."""
+    topic_terms = {w.lower() for w in WORD.findall(topic or "")}
+    seen = set()
+    scored = []
+    for position, headline in enumerate(headlines):
+        headline = headline.strip()
+        key = headline.lower()
+        if not headline or key in seen or is_noise(headline):
+            continue
+        seen.add(key)
+        scored.append((_headline_score(headline, position, topic_terms), position, headline))
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [headline for _, _, headline in scored]
+
+
+def fit_headlines(
+    headlines: str, budget: int = SUMMARY_INPUT_TOKENS, topic: Optional[str] = None
+) -> str:
+    """
+    Keep the most important headlines that fit in a token budget.
+
+    Args:
+        headlines: Newline separated headlines, as returned by extract_headlines
+        budget: Maximum estimated tokens for the result
+        topic: Optional topic used to prefer relevant headlines
+
+    Returns:
+        str: Selected headlines, newline separated, in their original page order
+    """
+    lines = headlines.split("\n")
+    order = {}
+    for position, line in enumerate(lines):
+        order.setdefault(line.strip(), position)
+
+    kept = []
+    used = 0
+    for headline in rank_headlines(lines, topic):
+        cost = count_tokens(headline) + 1
+        if used + cost > budget:
+            continue
+        kept.append(headline)
+        used += cost
+    kept.sort(key=lambda headline: order[headline])
+    return "\n".join(kept)
+
+
+def trim_to_budget(text: str, budget: int) -> str:
+    """Cut text at a sentence boundary so it fits in budget tokens.
+
+    Summaries are written most-important-first, so the leading sentences are kept.
+    """
+    if count_tokens(text) <= budget:
+        return text
+    kept = []
+    used = 0
+    for sentence in SENTENCE_BREAK.split(text):
+        cost = count_tokens(sentence)
+        if used + cost > budget:
+            break
+        kept.append(sentence)
+        used += cost
+    if not kept:
+        # A single oversized sentence: fall back to a character cut.
+        return text[: int(budget * CHARS_PER_TOKEN)]
+    return " ".join(kept)
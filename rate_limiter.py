@@ -0,0 +1,343 @@
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, List, Mapping, Optional
+
+from dotenv import load_dotenv
+from groq import RateLimitError
+
+from cache import CACHE_DIR
+from prompt_budget import count_tokens
+
+load_dotenv()
+
+
+GROQ_RPM = float(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM = float(os.getenv("GROQ_TPM", "15000"))
+RATE_LIMIT_DB = Path(os.getenv("GROQ_RATE_LIMIT_DB", str(CACHE_DIR / "ratelimit.sqlite")))
+RATE_LIMIT_RETRIES = 5
+MAX_SLEEP = 5.0
+
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value: Optional[str]) -> float:
+    """Parse Groq reset durations such as "7.66s", "2m59.56s" or "120ms"."""
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    return sum(
+        float(amount) * DURATION_SECONDS[unit]
+        for amount, unit in DURATION_PART.findall(value)
+    )
+
+
+class SharedRateLimiter:
+    """Request and token buckets shared by every process through SQLite.
+
+    Callers reserve one request and an estimated token count before each
+    completion and wait (never fail) until both buckets can cover it. The
+    buckets are corrected from Groq's x-ratelimit-* response headers, and a
+    429 blocks every process until the server's retry-after has passed.
+    Changing GROQ_RPM or GROQ_TPM resets the stored capacity on the next start.
+    """
+
+    def __init__(
+        self,
+        path=RATE_LIMIT_DB,
+        requests_per_minute: float = GROQ_RPM,
+        tokens_per_minute: float = GROQ_TPM,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.requests_per_minute = requests_per_minute
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), check_same_thread=False, timeout=30, isolation_level=None
+        )
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS buckets (
+                    name TEXT PRIMARY KEY,
+                    capacity REAL NOT NULL,
+                    available REAL NOT NULL,
+                    rate REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    blocked_until REAL NOT NULL DEFAULT 0,
+                    configured REAL
+                )
+                """
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(buckets)")]
+            if "configured" not in columns:
+                self._conn.execute("ALTER TABLE buckets ADD COLUMN configured REAL")
+            # configured remembers the limit each bucket was created from, so a
+            # changed setting replaces the stored capacity while a restart with
+            # the same setting keeps what was learned from response headers.
+            now = time.time()
+            for name, per_minute in (
+                ("requests", requests_per_minute),
+                ("tokens", tokens_per_minute),
+            ):
+                self._conn.execute(
+                    """
+                    INSERT INTO buckets
+                        (name, capacity, available, rate, updated_at, configured)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (name) DO UPDATE SET
+                        capacity = excluded.capacity,
+                        available = MIN(available, excluded.capacity),
+                        rate = excluded.rate,
+                        configured = excluded.configured
+                    WHERE configured IS NULL OR configured != excluded.configured
+                    """,
+                    (name, per_minute, per_minute, per_minute / 60, now, per_minute),
+                )
+
+    def _transaction(self, fn):
+        """Run fn(rows, now) in an exclusive cross-process transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                rows = {
+                    row[0]: list(row[1:])
+                    for row in self._conn.execute(
+                        "SELECT name, capacity, available, rate, updated_at,"
+                        " blocked_until FROM buckets"
+                    )
+                }
+                for bucket in rows.values():
+                    capacity, available, rate, updated_at, _ = bucket
+                    bucket[1] = min(capacity, available + (now - updated_at) * rate)
+                    bucket[3] = now
+                result = fn(rows, now)
+                self._conn.executemany(
+                    "UPDATE buckets SET capacity = ?, available = ?, rate = ?,"
+                    " updated_at = ?, blocked_until = ? WHERE name = ?",
+                    [(*bucket, name) for name, bucket in rows.items()],
+                )
+                self._conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _wait_for(rows, now: float, tokens: float) -> float:
+        wait = 0.0
+        for name, amount in (("requests", 1.0), ("tokens", tokens)):
+            capacity, available, rate, _, blocked_until = rows[name]
+            amount = min(amount, capacity)
+            if blocked_until > now:
+                wait = max(wait, blocked_until - now)
+            elif available < amount:
+                wait = max(wait, (amount - available) / rate if rate else MAX_SLEEP)
+        return wait
+
+    def try_acquire(self, tokens: float) -> float:
+        """Reserve a request and tokens; returns 0 on success or seconds to wait."""
+
+        def reserve(rows, now):
+            wait = self._wait_for(rows, now, tokens)
+            if wait == 0:
+                rows["requests"][1] -= 1
+                rows["tokens"][1] -= min(tokens, rows["tokens"][0])
+            return wait
+
+        return self._transaction(reserve)
+
+    def expected_wait(self, tokens: float) -> float:
+        """Seconds a call needing tokens would wait right now (nothing is reserved)."""
+        return self._transaction(lambda rows, now: self._wait_for(rows, now, tokens))
+
+    def acquire(self, tokens: float):
+        """Block until the request fits in the shared budget."""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0:
+                return
+            time.sleep(min(wait, MAX_SLEEP))
+
+    async def acquire_async(self, tokens: float):
+        """Wait without blocking the event loop until the request fits."""
+        while True:
+            wait = await asyncio.to_thread(self.try_acquire, tokens)
+            if wait == 0:
+                return
+            await asyncio.sleep(min(wait, MAX_SLEEP))
+
+    def refund(self, tokens: float):
+        """Return tokens reserved but not used by a completion.
+
+        A negative amount charges usage above the reservation; the bucket
+        may go below zero and later callers wait until it refills.
+        """
+        if tokens == 0:
+            return
+
+        def give_back(rows, now):
+            bucket = rows["tokens"]
+            bucket[1] = min(bucket[0], bucket[1] + tokens)
+
+        self._transaction(give_back)
+
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """Adapt the buckets to the limits and remaining quota reported by Groq."""
+
+        def adapt(rows, now):
+            limit = headers.get("x-ratelimit-limit-tokens")
+            remaining = headers.get("x-ratelimit-remaining-tokens")
+            if limit:
+                rows["tokens"][0] = float(limit)
+                rows["tokens"][2] = float(limit) / 60
+            if remaining is not None:
+                rows["tokens"][1] = min(rows["tokens"][1], float(remaining))
+
+            # Groq reports the request limit per day: it caps the per-minute
+            # bucket, and once it is exhausted nobody may call until it resets.
+            limit_requests = headers.get("x-ratelimit-limit-requests")
+            remaining_requests = headers.get("x-ratelimit-remaining-requests")
+            if limit_requests:
+                capacity = min(self.requests_per_minute, float(limit_requests))
+                rows["requests"][0] = capacity
+                rows["requests"][1] = min(rows["requests"][1], capacity)
+                rows["requests"][2] = capacity / 60
+            if remaining_requests is not None:
+                rows["requests"][1] = min(rows["requests"][1], float(remaining_requests))
+                if float(remaining_requests) <= 0:
+                    reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+                    rows["requests"][4] = max(rows["requests"][4], now + reset)
+
+            retry_after = headers.get("retry-after")
+            if retry_after:
+                for bucket in rows.values():
+                    bucket[4] = max(bucket[4], now + parse_duration(retry_after))
+
+        self._transaction(adapt)
+
+    def stats(self) -> dict:
+        def snapshot(rows, now):
+            return {
+                name: {
+                    "capacity": round(capacity, 1),
+                    "available": round(available, 1),
+                    "per_second": round(rate, 3),
+                    "blocked_for": round(max(0.0, blocked_until - now), 1),
+                }
+                for name, (capacity, available, rate, _, blocked_until) in rows.items()
+            }
+
+        return self._transaction(snapshot)
+
+
+groq_limiter = SharedRateLimiter()
+
+
+def estimate_tokens(messages: List[dict], max_tokens: int) -> int:
+    """Tokens a completion can consume: the prompt plus the full output budget."""
+    return sum(count_tokens(message["content"]) for message in messages) + max_tokens
+
+
+def _settle(reserved: int, response):
+    usage = getattr(response, "usage", None)
+    if usage is not None and getattr(usage, "total_tokens", None):
+        groq_limiter.refund(reserved - usage.total_tokens)
+
+
+def _chunk_usage(chunk):
+    # Groq reports usage on the last chunk, under x_groq in older API versions
+    usage = getattr(chunk, "usage", None) or getattr(
+        getattr(chunk, "x_groq", None), "usage", None
+    )
+    return usage if getattr(usage, "total_tokens", None) else None
+
+
+def _settled_stream(stream, reserved: int, messages: List[dict]) -> Iterator:
+    """
+    Yield a completion stream's chunks, then refund the unused reservation.
+
+    Uses the usage Groq sends with the final chunk; a stream closed early or
+    without usage is charged for the prompt plus the text received.
+    """
+    usage = None
+    parts = []
+    try:
+        for chunk in stream:
+            usage = _chunk_usage(chunk) or usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+            yield chunk
+    finally:
+        if usage is not None:
+            used = usage.total_tokens
+        else:
+            used = estimate_tokens(messages, 0) + count_tokens("".join(parts))
+        groq_limiter.refund(reserved - used)
+
+
+def limited_create(client, **kwargs):
+    """
+    Call client.chat.completions.create under the shared Groq rate limit.
+
+    Waits for budget instead of failing, learns from the response headers and
+    waits out 429 responses before retrying.
+    """
+    reserved = estimate_tokens(kwargs["messages"], kwargs["max_tokens"])
+    for attempt in range(RATE_LIMIT_RETRIES):
+        groq_limiter.acquire(reserved)
+        try:
+            raw = client.chat.completions.with_raw_response.create(**kwargs)
+            response = raw.parse()
+        except RateLimitError as e:
+            # A rejected or failed call consumed nothing of the reservation
+            groq_limiter.refund(reserved)
+            groq_limiter.update_from_headers(e.response.headers)
+            if attempt == RATE_LIMIT_RETRIES - 1:
+                raise
+            continue
+        except BaseException:
+            groq_limiter.refund(reserved)
+            raise
+        # Applied first for streams, whose usage is only known at the end; the
+        # server's remaining quota overrides local bookkeeping.
+        if kwargs.get("stream"):
+            groq_limiter.update_from_headers(raw.headers)
+            return _settled_stream(response, reserved, kwargs["messages"])
+        _settle(reserved, response)
+        groq_limiter.update_from_headers(raw.headers)
+        return response
+
+
+async def async_limited_create(client, **kwargs):
+    """Async counterpart of limited_create for an AsyncGroq client."""
+    reserved = estimate_tokens(kwargs["messages"], kwargs["max_tokens"])
+    for attempt in range(RATE_LIMIT_RETRIES):
+        await groq_limiter.acquire_async(reserved)
+        try:
+            raw = await client.chat.completions.with_raw_response.create(**kwargs)
+            response = await raw.parse()
+        except RateLimitError as e:
+            # A rejected or failed call consumed nothing of the reservation
+            await asyncio.to_thread(groq_limiter.refund, reserved)
+            await asyncio.to_thread(groq_limiter.update_from_headers, e.response.headers)
+            if attempt == RATE_LIMIT_RETRIES - 1:
+                raise
+            continue
+        except BaseException:
+            await asyncio.to_thread(groq_limiter.refund, reserved)
+            raise
+        if not kwargs.get("stream"):
+            await asyncio.to_thread(_settle, reserved, response)
+        await asyncio.to_thread(groq_limiter.update_from_headers, raw.headers)
+        return response
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution (threads).
+
+    The first caller for a key runs fn; callers arriving while it is still
+    running block and receive the same result or exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of SingleFlight for coroutine functions.
+
+    The shared computation runs as its own task, so a caller that is
+    cancelled does not cancel the work other callers are waiting on.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        # Tasks belong to one event loop, so keys are scoped per loop.
+        scoped_key = (id(asyncio.get_running_loop()), key)
+        task = self._calls.get(scoped_key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[scoped_key] = task
+            task.add_done_callback(lambda _: self._calls.pop(scoped_key, None))
+        return await asyncio.shield(task)
@@ -1,7 +1,10 @@
+import asyncio
 from typing import List, Dict
-import os
 from dotenv import load_dotenv
-from groq import Groq
+
+from event_loop import run_in_new_loop
+from groq_client import get_async_groq_client
+from llm_cache import async_cached_completion
 
 load_dotenv()
 
@@ -9,17 +12,15 @@ load_dotenv()
 async def analyze_social_discussions(topics: List[str]) -> Dict[str, Dict[str, str]]:
     """Process list of topics and return social media analysis results using Groq"""
 
-    social_results = {}
-    for topic in topics:
-        social_results[topic] = await analyze_topic_sentiment(topic)
+    analyses = await asyncio.gather(*(analyze_topic_sentiment(t) for t in topics))
 
-    return {"social_analysis": social_results}
+    return {"social_analysis": dict(zip(topics, analyses))}
 
 
 async def analyze_topic_sentiment(topic: str) -> str:
     """Analyze a single topic using Groq to simulate social media discussions"""
     try:
-        client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        client = get_async_groq_client()
 
         prompt = f"""You are a social media analysis expert. Analyze recent discussions about '{topic}' across social platforms like Reddit, Twitter, and forums.
         
@@ -34,15 +35,15 @@ async def analyze_topic_sentiment(topic: str) -> str:
         Format as a natural analysis that captures authentic social media discussion patterns.
         Make it engaging and informative for news reporting."""
 
-        response = client.chat.completions.create(
+        return await async_cached_completion(
+            "social_sentiment",
+            client,
             model="gemma2-9b-it",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7,
             max_tokens=1200,
         )
 
-        return response.choices[0].message.content
-
     except Exception as e:
         return f"Unable to analyze social media discussions for '{topic}' at this time. Error: {str(e)}"
 
@@ -62,14 +63,8 @@ def analyze_social_media_discussion(topic: str) -> str:
     Synchronous wrapper for analyzing a single topic's social media discussion.
     Used by Streamlit app for easy integration.
     """
-    import asyncio
-
     try:
-        # Create and run async function
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(analyze_social_discussions([topic]))
-        loop.close()
+        result = run_in_new_loop(analyze_social_discussions([topic]))
 
         # Extract the analysis for the topic
         if "social_analysis" in result and topic in result["social_analysis"]:
@@ -1,5 +1,4 @@
 import streamlit as st
-import asyncio
 import os
 from dotenv import load_dotenv
 import sys
@@ -21,6 +20,7 @@ st.set_page_config(
 
 # Import backend functions
 try:
+    from event_loop import run_in_new_loop
     from news_scraper import NewsScraper
     from social_analyzer import analyze_social_discussions
     from utils import generate_broadcast_news_with_groq, tts_to_audio
@@ -182,14 +182,7 @@ def generate_news_audio_streamlit(topics, source_type):
                 news_scraper = NewsScraper()
 
                 # Run async function in Streamlit
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    results["news"] = loop.run_until_complete(
-                        news_scraper.scrape_news(topics)
-                    )
-                finally:
-                    loop.close()
+                results["news"] = run_in_new_loop(news_scraper.scrape_news(topics))
 
                 st.success(
                     f"✅ News analysis complete: {len(results.get('news', {}).get('news_analysis', {}))} topics"
@@ -200,14 +193,7 @@ def generate_news_audio_streamlit(topics, source_type):
                 st.info("📱 Processing social media discussions...")
 
                 # Run async function in Streamlit
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    results["social"] = loop.run_until_complete(
-                        analyze_social_discussions(topics)
-                    )
-                finally:
-                    loop.close()
+                results["social"] = run_in_new_loop(analyze_social_discussions(topics))
 
                 st.success(
                     f"✅ Social media analysis complete: {len(results.get('social', {}).get('social_analysis', {}))} topics"
@@ -0,0 +1,37 @@
+"""Tests for the persistent job queue."""
+
+import threading
+
+from jobs import JobQueue
+from models import NewsRequest
+
+
+def test_concurrent_queues_claim_each_job_once(tmp_path):
+    """Two queues on one database (two uvicorn workers) never claim a job twice."""
+    path = tmp_path / "jobs.sqlite"
+    submitter = JobQueue(path)
+    request = NewsRequest(topics=["technology"], source_type="news")
+    submitted = {submitter.submit(request) for _ in range(200)}
+
+    queues = [JobQueue(path), JobQueue(path)]
+    claimed = [[], []]
+    start = threading.Barrier(len(queues))
+
+    def drain(index: int):
+        start.wait()
+        while True:
+            job = queues[index].claim_next()
+            if job is None:
+                return
+            claimed[index].append(job[0])
+
+    threads = [threading.Thread(target=drain, args=(i,)) for i in range(len(queues))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    all_claimed = claimed[0] + claimed[1]
+    assert len(all_claimed) == len(submitted)
+    assert set(all_claimed) == submitted
+    assert all(submitter.get(job_id)["status"] == "running" for job_id in submitted)
@@ -0,0 +1,44 @@
+"""Tests for the background prefetch scheduler."""
+
+import asyncio
+
+import prefetch
+from models import NewsRequest
+from prefetch import PrefetchScheduler, TopicPopularity
+
+
+def test_seed_topics_alone_are_warmed(monkeypatch):
+    """Seed topics are warmed without any user requests."""
+    warmed = []
+
+    async def fake_warm(topic, source_type, audio=False):
+        warmed.append((topic, source_type))
+
+    monkeypatch.setattr(prefetch, "warm_topic", fake_warm)
+    scheduler = PrefetchScheduler(
+        TopicPopularity(), min_score=2, seed_topics=["AI technology", "Tesla stock"]
+    )
+
+    asyncio.run(scheduler.run_once())
+
+    assert warmed == [("AI technology", "news"), ("Tesla stock", "news")]
+    assert scheduler.warmed == 2
+
+
+def test_popular_topics_come_before_seeds_without_repeats(monkeypatch):
+    warmed = []
+
+    async def fake_warm(topic, source_type, audio=False):
+        warmed.append(topic)
+
+    monkeypatch.setattr(prefetch, "warm_topic", fake_warm)
+    popularity = TopicPopularity()
+    for _ in range(3):
+        popularity.record(NewsRequest(topics=["NBA playoffs", "AI Technology"], source_type="news"))
+    scheduler = PrefetchScheduler(
+        popularity, min_score=2, seed_topics=["ai technology", "Tesla stock"]
+    )
+
+    asyncio.run(scheduler.run_once())
+
+    assert warmed == ["NBA playoffs", "AI Technology", "Tesla stock"]
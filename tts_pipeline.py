@@ -0,0 +1,303 @@
+import hashlib
+import io
+import os
+import queue
+import re
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List
+
+from dotenv import load_dotenv
+from gtts import gTTS
+
+from cache import CACHE_DIR, DiskCache
+
+load_dotenv()
+
+
+# A sentence ends at . ! or ? (optionally followed by closing quotes or
+# brackets) and whitespace.
+SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "3"))
+TTS_CHUNK_CHARS = int(os.getenv("TTS_CHUNK_CHARS", "400"))
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+
+segment_cache = DiskCache(
+    CACHE_DIR / "tts_segments.sqlite",
+    max_bytes=int(float(os.getenv("TTS_CACHE_MAX_MB", "200")) * 1024 * 1024),
+)
+
+# MPEG audio bitrates in kbps, indexed by (version is MPEG-1, layer) then by
+# the 4-bit bitrate index of the frame header.
+_BITRATES = {
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],  # MPEG-2.5
+}
+
+
+class SentenceSplitter:
+    """Incrementally cut streamed text into sentences.
+
+    Fragments shorter than min_chars (abbreviations, "Meanwhile.") are merged
+    into the following sentence so TTS is not called for tiny snippets.
+    """
+
+    def __init__(self, min_chars: int = 40):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self._buffer):
+            candidate = self._buffer[start : match.end()].strip()
+            if len(candidate) >= self.min_chars:
+                sentences.append(candidate)
+                start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> List[str]:
+        remainder = self._buffer.strip()
+        self._buffer = ""
+        return [remainder] if remainder else []
+
+
+def split_sentences(text: str, min_chars: int = 40) -> List[str]:
+    splitter = SentenceSplitter(min_chars)
+    return splitter.feed(text) + splitter.flush()
+
+
+def iter_sentences(text_stream: Iterable[str], min_chars: int = 40) -> Iterator[str]:
+    """Yield complete sentences from a stream of text deltas as soon as they end."""
+    splitter = SentenceSplitter(min_chars)
+    for delta in text_stream:
+        yield from splitter.feed(delta)
+    yield from splitter.flush()
+
+
+def split_chunks(text: str, max_chars: int = TTS_CHUNK_CHARS) -> List[str]:
+    """Group sentences into chunks of at most max_chars (a longer sentence stays whole)."""
+    chunks = []
+    current = ""
+    for sentence in split_sentences(text, min_chars=1):
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _frame_length(header: bytes) -> int:
+    """Length in bytes of the MPEG audio frame starting with header, or 0 if invalid."""
+    if header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return 0
+    version = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    bitrate_index = (header[2] >> 4) & 0x0F
+    rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return 0
+
+    mpeg1 = version == 3
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4
+    samples = 1152 if layer == 2 or mpeg1 else 576
+    return samples // 8 * bitrate // sample_rate + padding
+
+
+def iter_mp3_frames(data: bytes) -> Iterator[bytes]:
+    """
+    Yield the audio frames of an MP3 file without decoding them.
+
+    ID3v2/ID3v1 tags, Xing/Info/VBRI header frames (which describe the whole
+    file and would be wrong in a concatenation) and stray bytes are skipped.
+    """
+    pos = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        pos = 10 + size + (10 if data[5] & 0x10 else 0)
+    end = len(data) - 128 if data[-128:-125] == b"TAG" else len(data)
+
+    first = True
+    while pos + 4 <= end:
+        length = _frame_length(data[pos : pos + 4])
+        if length == 0 or pos + length > end:
+            pos += 1
+            continue
+        frame = data[pos : pos + length]
+        pos += length
+        if first:
+            first = False
+            head = frame[:64]
+            if b"Xing" in head or b"Info" in head or b"VBRI" in head:
+                continue
+        yield frame
+
+
+def concat_mp3(segments: Iterable[bytes]) -> bytes:
+    """Join MP3 segments at frame level into one stream, without re-encoding."""
+    return b"".join(frame for segment in segments for frame in iter_mp3_frames(segment))
+
+
+def normalize_segment_text(text: str) -> str:
+    """Normalize sentence text for cache lookups (Unicode form and whitespace)."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def cached_segment(
+    engine: str, text: str, render: Callable[[str], bytes], context: str = ""
+) -> bytes:
+    """
+    Return the encoded audio for one segment, rendering it only on a cache miss.
+
+    Args:
+        engine: Engine and voice identity, e.g. "gtts:en" or
+            "elevenlabs:<voice_id>:<model_id>:<output_format>"
+        text: Segment text
+        render: Callable producing the encoded audio for text
+        context: Surrounding text the rendering depends on, if any; part of
+            the cache key
+
+    Returns:
+        bytes: Encoded audio for the segment
+    """
+    if not TTS_CACHE_ENABLED:
+        return render(text)
+
+    normalized = normalize_segment_text(text)
+    if context:
+        normalized += "\n" + normalize_segment_text(context)
+    key = hashlib.sha256(f"{engine}\n{normalized}".encode("utf-8")).hexdigest()
+    entry = segment_cache.get(key)
+    if entry is not None:
+        return entry.value
+
+    audio = render(text)
+    if audio:
+        segment_cache.set(key, audio, {"engine": engine})
+    return audio
+
+
+def synthesize_segment(text: str, language: str = "en") -> bytes:
+    """Render one piece of text to MP3 bytes with gTTS, reusing cached segments."""
+
+    def render(segment: str) -> bytes:
+        buffer = io.BytesIO()
+        gTTS(text=segment, lang=language, slow=False).write_to_fp(buffer)
+        return buffer.getvalue()
+
+    return cached_segment(f"gtts:{language}", text, render)
+
+
+def stream_tts(
+    sentences: Iterable[str], language: str = "en", max_workers: int = TTS_WORKERS
+) -> Iterator[bytes]:
+    """
+    Synthesize sentences on a worker pool while they are still being produced.
+
+    Each sentence is submitted as soon as the iterable yields it, and the
+    resulting MP3 segments are yielded in order as they finish, so playback
+    can start after the first sentence instead of after the whole script.
+    """
+    futures = queue.Queue()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+
+        def produce():
+            # Runs the (slow) sentence source on its own thread so finished
+            # segments can be yielded while the next sentence is still coming.
+            try:
+                for sentence in sentences:
+                    futures.put(pool.submit(synthesize_segment, sentence, language))
+            except Exception as e:
+                futures.put(e)
+            finally:
+                futures.put(None)
+
+        threading.Thread(target=produce, daemon=True).start()
+
+        while True:
+            item = futures.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield concat_mp3([item.result()])
+
+
+def synthesis_units(text: str) -> List[str]:
+    """
+    Split a script into the pieces that are synthesized independently.
+
+    With the segment cache on, each sentence is its own unit so repeated
+    sentences are served from cache; otherwise sentences are grouped into
+    chunks of up to TTS_CHUNK_CHARS to keep the number of requests low.
+    """
+    return split_sentences(text) if TTS_CACHE_ENABLED else split_chunks(text)
+
+
+def synthesize_chunked(
+    text: str,
+    language: str = "en",
+    max_workers: int = TTS_WORKERS,
+    synthesize: Callable[..., bytes] = None,
+    engine: str = None,
+    with_context: bool = False,
+) -> bytes:
+    """
+    Render text by synthesizing sentence-aligned pieces concurrently.
+
+    Args:
+        text: Script to render
+        language: gTTS language code (ignored when synthesize is given)
+        max_workers: Size of the worker pool
+        synthesize: Optional callable rendering one piece to MP3 bytes,
+            defaults to gTTS
+        engine: Engine/voice identity used as segment cache key for a custom
+            synthesize callable
+        with_context: Call synthesize(piece, previous_piece, next_piece) with
+            the neighbours of that position (None at either end)
+
+    Returns:
+        bytes: One MP3 stream made of the pieces' frames in script order
+    """
+    units = synthesis_units(text)
+
+    def render(index: int) -> bytes:
+        unit = units[index]
+        if synthesize is None:
+            return synthesize_segment(unit, language)
+        piece, context = synthesize, ""
+        if with_context:
+            # Neighbours are looked up by position: a repeated sentence gets
+            # the context of each place it appears.
+            previous = units[index - 1] if index > 0 else None
+            following = units[index + 1] if index + 1 < len(units) else None
+            piece = lambda unit: synthesize(unit, previous, following)
+            context = f"{previous or ''}\n{following or ''}"
+        return cached_segment(engine, unit, piece, context) if engine else piece(unit)
+
+    if len(units) <= 1:
+        return concat_mp3(render(index) for index in range(len(units)))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return concat_mp3(pool.map(render, range(len(units))))
@@ -1,14 +1,45 @@
-from urllib.parse import quote_plus
+from urllib.parse import quote_plus, urlsplit, urlunsplit, parse_qsl, urlencode
 from dotenv import load_dotenv
+import asyncio
+import io
 import requests
 import os
+import time
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 from fastapi import HTTPException
 from bs4 import BeautifulSoup
-from datetime import datetime
 from elevenlabs import ElevenLabs
 from gtts import gTTS
 
+from audio_store import get_audio_store
+from cache import CACHE_DIR, DiskCache
+from circuit_breaker import BreakerGroup
+from groq_client import get_async_groq_client, get_groq_client
+from headline_extractor import (
+    HEADLINE_EXTRACTOR,
+    HEADLINE_LIMIT,
+    SCRAPE_STREAMING,
+    StreamingPage,
+    stream_headlines,
+)
+from hedging import HEDGE_ENABLED, HedgePolicy
+from http_client import DEFAULT_HEADERS, http_client
+from llm_cache import (
+    async_cached_completion,
+    cached_completion,
+    cached_completion_stream,
+)
+from prompt_budget import (
+    BROADCAST_INPUT_TOKENS,
+    SUMMARY_INPUT_TOKENS,
+    fit_headlines,
+    trim_to_budget,
+)
+from singleflight import AsyncSingleFlight, SingleFlight
+from tts_pipeline import synthesize_chunked
+
 load_dotenv(override=True)
 
 
@@ -41,10 +72,193 @@ def generate_news_urls_to_scrape(list_of_keywords):
     return valid_urls_dict
 
 
+BRIGHTDATA_REQUEST_URL = "https://api.brightdata.com/request"
+FREE_SCRAPE_TIMEOUT = 15
+
+
+def use_brightdata() -> bool:
+    """Check if BrightData should be used (API key available and not disabled)."""
+    return bool(
+        os.getenv("BRIGHTDATA_API_KEY")
+        and os.getenv("WEB_UNLOCKER_ZONE")
+        and os.getenv("USE_BRIGHTDATA", "false").lower() == "true"
+    )
+
+
+def brightdata_request_args(url: str) -> dict:
+    """Build the headers and JSON payload for a BrightData /request call."""
+    return {
+        "headers": {
+            "Authorization": f"Bearer {os.getenv('BRIGHTDATA_API_KEY')}",
+            "Content-Type": "application/json",
+        },
+        "json": {
+            "zone": os.getenv("WEB_UNLOCKER_ZONE"),
+            "url": url,
+            "format": "raw",
+        },
+    }
+
+
+scrape_flights = AsyncSingleFlight()
+
+# Mock generation is the last resort and is never reordered ahead of real
+# fetches; its breaker only records how often the chain falls through to it.
+scrape_breakers = BreakerGroup(["free", "brightdata", "mock"])
+scrape_hedge = HedgePolicy(max_delay=FREE_SCRAPE_TIMEOUT)
+
+page_cache = DiskCache(
+    CACHE_DIR / "pages.sqlite",
+    max_bytes=int(float(os.getenv("PAGE_CACHE_MAX_MB", "100")) * 1024 * 1024),
+    default_ttl=float(os.getenv("PAGE_CACHE_TTL", "600")),
+)
+
+
+@dataclass
+class ScrapedPage:
+    """A scraped page and where it came from."""
+
+    html: str
+    # Headlines parsed while streaming the download, if it was parsed
+    headlines: Optional[str] = None
+    # The download stopped early (headline limit or SCRAPE_MAX_MB)
+    partial: bool = False
+    # Stand-in content (AI-generated or static), not a real fetch of the URL
+    fallback: bool = False
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL for use as a cache key (case, query order, fragment)."""
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, "")
+    )
+
+
+def conditional_headers(entry) -> dict:
+    """Build If-None-Match / If-Modified-Since headers from a cached page."""
+    headers = {}
+    if entry is not None:
+        if entry.metadata.get("etag"):
+            headers["If-None-Match"] = entry.metadata["etag"]
+        if entry.metadata.get("last_modified"):
+            headers["If-Modified-Since"] = entry.metadata["last_modified"]
+    return headers
+
+
+def store_page(key: str, page: ScrapedPage, response_headers=None):
+    """Save a scraped page with its validators in the page cache."""
+    response_headers = response_headers or {}
+    page_cache.set(
+        key,
+        page.html.encode("utf-8"),
+        {
+            "etag": response_headers.get("ETag"),
+            "last_modified": response_headers.get("Last-Modified"),
+            "partial": page.partial,
+        },
+    )
+
+
+def cached_page(entry) -> ScrapedPage:
+    """The page stored in a page cache entry."""
+    return ScrapedPage(
+        entry.value.decode("utf-8"), partial=entry.metadata.get("partial", False)
+    )
+
+
+SCRAPE_CHUNK_SIZE = 64 * 1024
+
+
+def read_body(response) -> ScrapedPage:
+    """
+    Read a streamed requests response, stopping early when possible.
+
+    With SCRAPE_STREAMING the body is read in chunks up to SCRAPE_MAX_MB and
+    the download stops once HEADLINE_LIMIT headlines have been seen; the
+    headlines parsed on the way are returned with the page.
+    """
+    if not SCRAPE_STREAMING:
+        return ScrapedPage(response.text)
+    page = StreamingPage(response.encoding)
+    partial = False
+    for chunk in response.iter_content(SCRAPE_CHUNK_SIZE):
+        if page.add(chunk):
+            partial = True
+            break
+    if page.truncated:
+        print(f"⚠️ Page cut off at {page.max_bytes} bytes: {response.url}")
+    text = page.text()
+    return ScrapedPage(text, headlines=page.headlines(), partial=partial)
+
+
+async def async_read_body(response) -> ScrapedPage:
+    """Async counterpart of read_body for a streamed httpx response."""
+    if not SCRAPE_STREAMING:
+        await response.aread()
+        return ScrapedPage(response.text)
+    page = StreamingPage(response.encoding)
+    partial = False
+    async for chunk in response.aiter_bytes(SCRAPE_CHUNK_SIZE):
+        # Parsing for the headline limit is CPU work; keep it off the loop
+        if page.extractor is not None:
+            done = await asyncio.to_thread(page.add, chunk)
+        else:
+            done = page.add(chunk)
+        if done:
+            partial = True
+            break
+    if page.truncated:
+        print(f"⚠️ Page cut off at {page.max_bytes} bytes: {response.url}")
+    text = page.text()
+    headlines = await asyncio.to_thread(page.headlines) if page.extractor else None
+    return ScrapedPage(text, headlines=headlines, partial=partial)
+
+
+def scrape_methods() -> list:
+    """Real fetch methods in the order they should be tried, healthiest first."""
+    methods = ["free", "brightdata"] if use_brightdata() else ["free"]
+    return scrape_breakers.order(methods)
+
+
+def _fetch_free(url: str, key: str, cached) -> str:
+    print(f"Attempting free scraping for: {url}")
+    with requests.get(
+        url,
+        headers={**DEFAULT_HEADERS, **conditional_headers(cached)},
+        timeout=FREE_SCRAPE_TIMEOUT,
+        stream=True,
+    ) as response:
+        if response.status_code == 304 and cached is not None:
+            print("✅ Cached page revalidated (304 Not Modified)")
+            page_cache.touch(key)
+            return cached.value.decode("utf-8")
+        response.raise_for_status()
+        page = read_body(response)
+    print("✅ Free scraping successful!")
+    store_page(key, page, response.headers)
+    return page.html
+
+
+def _fetch_brightdata(url: str, key: str, cached) -> str:
+    print("Attempting BrightData scraping...")
+    with requests.post(
+        BRIGHTDATA_REQUEST_URL, **brightdata_request_args(url), stream=True
+    ) as response:
+        response.raise_for_status()
+        page = read_body(response)
+    print("✅ BrightData scraping successful!")
+    store_page(key, page)
+    return page.html
+
+
 def scrape_with_brightdata(url: str) -> str:
     """
     Scrape the content of a webpage using multiple methods.
-    Priority: Free methods first, then BrightData if enabled.
+    Methods are tried healthiest first (free, then BrightData if enabled, by
+    default); a method whose circuit is open is skipped without waiting.
+    AI-generated mock content is the final fallback.
 
     Args:
         url (str): The URL of the page to scrape.
@@ -52,58 +266,205 @@ def scrape_with_brightdata(url: str) -> str:
     Returns:
         str: The scraped content of the page.
     """
-    # Check if BrightData should be used (when API key is available and not disabled)
-    use_brightdata = (
-        os.getenv("BRIGHTDATA_API_KEY")
-        and os.getenv("WEB_UNLOCKER_ZONE")
-        and os.getenv("USE_BRIGHTDATA", "false").lower() == "true"
-    )
+    key = normalize_url(url)
+    cached = page_cache.get(key, allow_stale=True)
+    if cached is not None and cached.metadata.get("partial"):
+        # Cut off by a streamed fetch; callers here expect the whole page
+        cached = None
+    if cached is not None and cached.fresh:
+        print(f"✅ Serving cached page for: {url}")
+        return cached.value.decode("utf-8")
+
+    fetchers = {"free": _fetch_free, "brightdata": _fetch_brightdata}
+    for method in scrape_methods():
+        breaker = scrape_breakers[method]
+        if not breaker.allow():
+            print(f"Skipping {method} scraping (circuit open)")
+            continue
+        started = time.monotonic()
+        try:
+            text = fetchers[method](url, key, cached)
+        except Exception as e:
+            breaker.record_failure(time.monotonic() - started)
+            print(f"{method} scraping failed: {str(e)}")
+            continue
+        breaker.record_success(time.monotonic() - started)
+        return text
 
-    # Method 1: Try free requests first (always attempt this)
-    try:
-        print(f"Attempting free scraping for: {url}")
-        fallback_headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Accept-Encoding": "gzip, deflate",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1",
-        }
-        response = requests.get(url, headers=fallback_headers, timeout=15)
+    print("Using AI-generated news content as fallback...")
+    return generate_mock_news_content(url)
+
+
+async def async_scrape_with_brightdata(url: str, refresh: bool = False) -> str:
+    """
+    Async variant of scrape_with_brightdata using the shared keep-alive pool.
+
+    See async_scrape_page, which also reports whether the content is fallback.
+
+    Args:
+        url (str): The URL of the page to scrape.
+        refresh (bool): Revalidate even if the cached page is still fresh.
+
+    Returns:
+        str: The scraped content of the page.
+    """
+    return (await async_scrape_page(url, refresh)).html
+
+
+async def async_scrape_page(url: str, refresh: bool = False) -> ScrapedPage:
+    """
+    Scrape a page through the shared keep-alive pool.
+
+    Both the free fetch and the BrightData /request call go through
+    http_client, so connections are reused and the event loop is never blocked.
+    Concurrent calls for the same normalized URL share a single fetch. A free
+    fetch slower than its usual latency is hedged with BrightData, within
+    the SCRAPE_HEDGE_BUDGET share of requests.
+
+    Args:
+        url (str): The URL of the page to scrape.
+        refresh (bool): Revalidate even if the cached page is still fresh.
+
+    Returns:
+        ScrapedPage: The page, flagged when mock content stands in for it
+    """
+    key = normalize_url(url)
+    return await scrape_flights.do(key, lambda: _async_scrape(url, key, refresh))
+
+
+async def _async_fetch_free(url: str, key: str, cached) -> ScrapedPage:
+    print(f"Attempting free scraping for: {url}")
+    async with http_client.stream(
+        "GET", url, headers=conditional_headers(cached), timeout=FREE_SCRAPE_TIMEOUT
+    ) as response:
+        if response.status_code == 304 and cached is not None:
+            print("✅ Cached page revalidated (304 Not Modified)")
+            await asyncio.to_thread(page_cache.touch, key)
+            return cached_page(cached)
+        response.raise_for_status()
+        page = await async_read_body(response)
+    print("✅ Free scraping successful!")
+    await asyncio.to_thread(store_page, key, page, response.headers)
+    return page
+
+
+async def _async_fetch_brightdata(url: str, key: str, cached) -> ScrapedPage:
+    print("Attempting BrightData scraping...")
+    async with http_client.stream(
+        "POST", BRIGHTDATA_REQUEST_URL, **brightdata_request_args(url)
+    ) as response:
         response.raise_for_status()
-        print("✅ Free scraping successful!")
-        return response.text
+        page = await async_read_body(response)
+    print("✅ BrightData scraping successful!")
+    await asyncio.to_thread(store_page, key, page)
+    return page
+
+
+async def _async_attempt(method: str, url: str, key: str, cached) -> ScrapedPage:
+    """Run one fetch method, recording the outcome on its circuit breaker."""
+    fetchers = {"free": _async_fetch_free, "brightdata": _async_fetch_brightdata}
+    breaker = scrape_breakers[method]
+    started = time.monotonic()
+    try:
+        page = await fetchers[method](url, key, cached)
+    except asyncio.CancelledError:
+        # Lost a hedge race: not a verdict on the method's health
+        breaker.record_cancelled()
+        raise
     except Exception as e:
-        print(f"Free scraping failed: {str(e)}")
+        breaker.record_failure(time.monotonic() - started)
+        print(f"{method} scraping failed: {str(e)}")
+        raise
+    latency = time.monotonic() - started
+    breaker.record_success(latency)
+    scrape_hedge.observe(method, latency)
+    return page
+
+
+async def _hedged_attempt(primary: str, backup: str, url: str, key: str, cached):
+    """
+    Fetch with primary, racing backup against it if primary is slow.
 
-    # Method 2: Try BrightData if enabled and free method failed
-    if use_brightdata:
+    Once primary has been running for its hedge delay, backup is started in
+    parallel (budget and circuit permitting); the first success wins and the
+    other request is cancelled.
+
+    Returns:
+        tuple: (ScrapedPage or None if every started method failed, methods started)
+    """
+    first = asyncio.ensure_future(_async_attempt(primary, url, key, cached))
+    delay = scrape_hedge.delay(primary)
+    await asyncio.wait({first}, timeout=delay)
+
+    # Check the budget before allow(), which may claim the breaker's probe slot.
+    if first.done() or not scrape_hedge.can_hedge() or not scrape_breakers[backup].allow():
         try:
-            print("Attempting BrightData scraping...")
-            headers = {
-                "Authorization": f"Bearer {os.getenv('BRIGHTDATA_API_KEY')}",
-                "Content-Type": "application/json",
-            }
-
-            payload = {
-                "zone": os.getenv("WEB_UNLOCKER_ZONE"),
-                "url": url,
-                "format": "raw",
-            }
-
-            response = requests.post(
-                "https://api.brightdata.com/request", json=payload, headers=headers
-            )
-            response.raise_for_status()
-            print("✅ BrightData scraping successful!")
-            return response.text
-        except requests.exceptions.RequestException as e:
-            print(f"BrightData failed: {str(e)}")
+            return await first, [primary]
+        except Exception:
+            return None, [primary]
+
+    scrape_hedge.spend()
+    print(f"Hedging {primary} scraping with {backup} after {delay:.1f}s")
+    second = asyncio.ensure_future(_async_attempt(backup, url, key, cached))
+    pending = {first, second}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        scrape_hedge.record_win()
+                    return task.result(), [primary, backup]
+        return None, [primary, backup]
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _async_scrape(url: str, key: str, refresh: bool = False) -> ScrapedPage:
+    cached = await asyncio.to_thread(page_cache.get, key, True)
+    if cached is not None and cached.fresh and not refresh:
+        print(f"✅ Serving cached page for: {url}")
+        return cached_page(cached)
+
+    scrape_hedge.earn()
+    methods = scrape_methods()
+    while methods:
+        method = methods.pop(0)
+        if not scrape_breakers[method].allow():
+            print(f"Skipping {method} scraping (circuit open)")
+            continue
+        if HEDGE_ENABLED and methods:
+            page, started = await _hedged_attempt(method, methods[0], url, key, cached)
+            methods = [m for m in methods if m not in started]
+            if page is not None:
+                return page
+            continue
+        try:
+            return await _async_attempt(method, url, key, cached)
+        except Exception:
+            continue
 
-    # Method 3: Generate AI-powered mock content based on topic
     print("Using AI-generated news content as fallback...")
-    return generate_mock_news_content(url)
+    html = await asyncio.to_thread(generate_mock_news_content, url)
+    return ScrapedPage(html, fallback=True)
+
+
+STATIC_NEWS_HTML = """
+        <html><body>
+        <h1>Breaking News Updates</h1>
+        <h2>Latest developments in ongoing stories</h2>
+        <p>Breaking: Major updates expected in current events</p>
+        <h2>Technology sector sees continued growth</h2>
+        <p>Innovation drives market advances across multiple sectors</p>
+        <h2>Global markets respond to recent developments</h2>
+        <p>Financial indicators show mixed signals amid uncertainty</p>
+        <h2>Sports roundup: Competition highlights</h2>
+        <p>Athletic achievements continue to inspire audiences worldwide</p>
+        <h2>Weather patterns shift seasonally</h2>
+        <p>Meteorologists track changing conditions across regions</p>
+        </body></html>
+        """
 
 
 def generate_mock_news_content(url: str) -> str:
@@ -117,6 +478,12 @@ def generate_mock_news_content(url: str) -> str:
     Returns:
         str: HTML formatted news content
     """
+    mock_breaker = scrape_breakers["mock"]
+    if not mock_breaker.allow():
+        print("Skipping AI news generation (circuit open)")
+        return STATIC_NEWS_HTML
+
+    started = time.monotonic()
     try:
         # Extract topic from Google News URL
         from urllib.parse import unquote_plus
@@ -130,9 +497,7 @@ def generate_mock_news_content(url: str) -> str:
             topic = "general news"
 
         # Use Groq to generate realistic news headlines
-        from groq import Groq
-
-        client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        client = get_groq_client()
 
         prompt = f"""Generate 5-7 realistic news headlines about '{topic}' that could appear on a news website today. 
         Make them current, relevant, and varied in tone (some breaking news, some analysis, some updates).
@@ -146,15 +511,15 @@ def generate_mock_news_content(url: str) -> str:
         
         Format as clean HTML that looks like it came from a real news site."""
 
-        response = client.chat.completions.create(
+        ai_content = cached_completion(
+            "mock_news",
+            client,
             model="gemma2-9b-it",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7,
             max_tokens=800,
         )
 
-        ai_content = response.choices[0].message.content
-
         # Wrap in proper HTML structure
         html_content = f"""
         <html><body>
@@ -166,26 +531,14 @@ def generate_mock_news_content(url: str) -> str:
         """
 
         print(f"✅ Generated AI news content for topic: {topic}")
+        mock_breaker.record_success(time.monotonic() - started)
         return html_content
 
     except Exception as e:
+        mock_breaker.record_failure(time.monotonic() - started)
         print(f"AI content generation failed: {str(e)}")
         # Ultimate fallback - static content
-        return """
-        <html><body>
-        <h1>Breaking News Updates</h1>
-        <h2>Latest developments in ongoing stories</h2>
-        <p>Breaking: Major updates expected in current events</p>
-        <h2>Technology sector sees continued growth</h2>
-        <p>Innovation drives market advances across multiple sectors</p>
-        <h2>Global markets respond to recent developments</h2>
-        <p>Financial indicators show mixed signals amid uncertainty</p>
-        <h2>Sports roundup: Competition highlights</h2>
-        <p>Athletic achievements continue to inspire audiences worldwide</p>
-        <h2>Weather patterns shift seasonally</h2>
-        <p>Meteorologists track changing conditions across regions</p>
-        </body></html>
-        """
+        return STATIC_NEWS_HTML
 
 
 def clean_html(html_content: str) -> str:
@@ -225,33 +578,99 @@ def extract_headlines(cleaned_text: str) -> str:
     return "\n".join(headlines)
 
 
-def summarize_with_groq(headlines) -> str:
-    """Summarize content using Groq API with Gemma model"""
+def build_summary_messages(headlines, topic: str = None) -> list:
+    """Build the chat messages asking Groq to turn headlines into a news script.
+
+    Headlines are ranked and trimmed to the SUMMARY_INPUT_TOKENS budget.
+    """
+    headlines = fit_headlines(headlines, SUMMARY_INPUT_TOKENS, topic)
     prompt = f"""You are my personal news editor. Summarize these headlines into a TV news script for me, focus on important headlines and remember that this text will be converted to audio:
     So no extra stuff other than text which the podcaster/newscaster should read, no special symbols or extra information in between and of course no preamble please.
     {headlines}
     News Script:"""
+    return [{"role": "user", "content": prompt}]
+
+
+def summarize_with_groq(headlines, topic: str = None) -> str:
+    """Summarize content using Groq API with Gemma model"""
     try:
-        from groq import Groq
-        import os
-        from fastapi import HTTPException
+        client = get_groq_client()
+        return cached_completion(
+            "summarize",
+            client,
+            model="gemma2-9b-it",
+            messages=build_summary_messages(headlines, topic),
+            temperature=0.4,
+            max_tokens=800,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Groq error: {str(e)}")
+
 
-        client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        response = client.chat.completions.create(
+async def async_summarize_with_groq(headlines, topic: str = None) -> str:
+    """Async variant of summarize_with_groq using the shared AsyncGroq client"""
+    try:
+        client = get_async_groq_client()
+        return await async_cached_completion(
+            "summarize",
+            client,
             model="gemma2-9b-it",
-            messages=[{"role": "user", "content": prompt}],
+            messages=build_summary_messages(headlines, topic),
             temperature=0.4,
             max_tokens=800,
-            stream=False,
         )
-        return response.choices[0].message.content
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Groq error: {str(e)}")
 
 
-def generate_broadcast_news_with_groq(news_data, social_data, topics):
-    """Generate broadcast news using Groq API with Gemma model"""
-    system_prompt = """
+def build_summary_update_messages(summary: str, new_headlines: str, topic: str = None) -> list:
+    """Build the chat messages asking Groq to revise a news script with new headlines.
+
+    New headlines are trimmed to the SUMMARY_INPUT_TOKENS budget.
+    """
+    new_headlines = fit_headlines(new_headlines, SUMMARY_INPUT_TOKENS, topic)
+    prompt = f"""You are my personal news editor. Below is the TV news script you wrote earlier, followed by headlines that appeared since. Rewrite the script so it covers the new developments, keep what is still relevant and drop anything the new headlines supersede. Remember that this text will be converted to audio:
+    So no extra stuff other than text which the podcaster/newscaster should read, no special symbols or extra information in between and of course no preamble please.
+    Current News Script:
+    {summary}
+    New Headlines:
+    {new_headlines}
+    Updated News Script:"""
+    return [{"role": "user", "content": prompt}]
+
+
+async def async_update_summary_with_groq(summary: str, new_headlines, topic: str = None) -> str:
+    """Revise an existing summary with new headlines using the shared AsyncGroq client"""
+    try:
+        client = get_async_groq_client()
+        return await async_cached_completion(
+            "summary_update",
+            client,
+            model="gemma2-9b-it",
+            messages=build_summary_update_messages(summary, new_headlines, topic),
+            temperature=0.4,
+            max_tokens=800,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Groq error: {str(e)}")
+
+
+def html_to_headlines(html_content: str) -> str:
+    """Clean a news page and extract its headlines (picklable for process pools).
+
+    HEADLINE_EXTRACTOR picks the single-pass streaming parser ("compat", the
+    default, or "fast") or the original BeautifulSoup path ("soup").
+    """
+    if HEADLINE_EXTRACTOR == "soup":
+        return extract_headlines(clean_html(html_content))
+    return stream_headlines(
+        html_content, HEADLINE_LIMIT, compat=HEADLINE_EXTRACTOR != "fast"
+    )
+
+
+NO_BROADCAST_CONTENT = "No content available for broadcast news generation."
+
+BROADCAST_SYSTEM_PROMPT = """
     You are broadcast_news_writer, a professional virtual news reporter. Generate natural, TTS-ready news reports using available sources:
 
     For each topic, STRUCTURE BASED ON AVAILABLE DATA:
@@ -271,7 +690,18 @@ def generate_broadcast_news_with_groq(news_data, social_data, topics):
     Write in full paragraphs optimized for speech synthesis. Avoid markdown.
     """
 
+
+def broadcast_max_tokens(topics) -> int:
+    """Output budget for the broadcast: about 60-120 seconds of speech per topic."""
+    return min(4000, 600 * max(len(topics), 1) + 200)
+
+
+def build_broadcast_messages(news_data, social_data, topics):
+    """Build the chat messages for the broadcast script, or None if there is no content."""
     topic_blocks = []
+    # Split the input budget evenly across topics so one verbose topic
+    # cannot crowd out the others.
+    topic_budget = BROADCAST_INPUT_TOKENS // max(len(topics), 1)
 
     for topic in topics:
         news_content = news_data["news_analysis"].get(topic) if news_data else ""
@@ -284,6 +714,15 @@ def generate_broadcast_news_with_groq(news_data, social_data, topics):
             elif "reddit_analysis" in social_data:
                 social_content = social_data["reddit_analysis"].get(topic, "")
 
+        if news_content and social_content:
+            # Official news leads the segment, so it gets the larger share.
+            news_content = trim_to_budget(news_content, topic_budget * 3 // 5)
+            social_content = trim_to_budget(social_content, topic_budget * 2 // 5)
+        elif news_content:
+            news_content = trim_to_budget(news_content, topic_budget)
+        elif social_content:
+            social_content = trim_to_budget(social_content, topic_budget)
+
         context = []
         if news_content:
             context.append(f"Official news content:\n{news_content}")
@@ -294,28 +733,83 @@ def generate_broadcast_news_with_groq(news_data, social_data, topics):
             topic_blocks.append(f"Topic: {topic}\n" + "\n".join(context))
 
     if not topic_blocks:
-        return "No content available for broadcast news generation."
+        return None
 
     user_prompt = (
         "Create broadcast segments for these topics using available sources:\n\n"
         + "\n\n--- NEW TOPIC ---\n\n".join(topic_blocks)
     )
 
+    return [
+        {"role": "system", "content": BROADCAST_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def generate_broadcast_news_with_groq(news_data, social_data, topics):
+    """Generate broadcast news using Groq API with Gemma model"""
+    messages = build_broadcast_messages(news_data, social_data, topics)
+    if messages is None:
+        return NO_BROADCAST_CONTENT
+
     try:
-        from groq import Groq
+        client = get_groq_client()
+        return cached_completion(
+            "broadcast",
+            client,
+            model="gemma2-9b-it",
+            messages=messages,
+            temperature=0.4,
+            max_tokens=broadcast_max_tokens(topics),
+        )
 
-        client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        response = client.chat.completions.create(
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Groq error: {str(e)}")
+
+
+async def async_generate_broadcast_news_with_groq(news_data, social_data, topics):
+    """Async variant of generate_broadcast_news_with_groq using AsyncGroq"""
+    messages = build_broadcast_messages(news_data, social_data, topics)
+    if messages is None:
+        return NO_BROADCAST_CONTENT
+
+    try:
+        client = get_async_groq_client()
+        return await async_cached_completion(
+            "broadcast",
+            client,
             model="gemma2-9b-it",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
+            messages=messages,
             temperature=0.4,
-            max_tokens=4000,
-            stream=False,
+            max_tokens=broadcast_max_tokens(topics),
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Groq error: {str(e)}")
+
+
+def stream_broadcast_news_with_groq(news_data, social_data, topics):
+    """
+    Stream the broadcast script from Groq as text deltas (stream=True).
+
+    Yields:
+        str: Pieces of the script as they are generated
+    """
+    messages = build_broadcast_messages(news_data, social_data, topics)
+    if messages is None:
+        yield NO_BROADCAST_CONTENT
+        return
+
+    try:
+        client = get_groq_client()
+        yield from cached_completion_stream(
+            "broadcast",
+            client,
+            model="gemma2-9b-it",
+            messages=messages,
+            temperature=0.4,
+            max_tokens=broadcast_max_tokens(topics),
         )
-        return response.choices[0].message.content
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Groq error: {str(e)}")
@@ -340,25 +834,26 @@ def summarize_with_groq_news_scripts(headlines: str) -> str:
     """
 
     try:
-        from groq import Groq
-
-        client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        response = client.chat.completions.create(
+        client = get_groq_client()
+        return cached_completion(
+            "news_script",
+            client,
             model="gemma2-9b-it",
             messages=[
                 {"role": "system", "content": system_prompt},
-                {"role": "user", "content": headlines},
+                {"role": "user", "content": fit_headlines(headlines)},
             ],
             temperature=0.4,
             max_tokens=1000,
-            stream=False,
         )
-        return response.choices[0].message.content
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Groq error: {str(e)}")
 
 
+TTS_CHUNKED = os.getenv("TTS_CHUNKED", "true").lower() == "true"
+
+
 def text_to_audio_elevenlabs_sdk(
     text: str,
     voice_id: str = "JBFqnCBsd6RMkjVDRZzb",
@@ -366,10 +861,16 @@ def text_to_audio_elevenlabs_sdk(
     output_format: str = "mp3_44100_128",
     output_dir: str = "audio",
     api_key: str = None,
+    chunked: bool = None,
 ) -> str:
     """
     Converts text to speech using ElevenLabs SDK and saves it to audio/ directory.
 
+    In chunked mode (default from TTS_CHUNKED, MP3 formats only) the text is
+    split into sentence-aligned chunks that are rendered concurrently, with
+    the neighbouring chunks passed as previous_text/next_text for continuous
+    prosody, and joined at MP3 frame level.
+
     Returns:
         str: Path to the saved audio file.
     """
@@ -378,27 +879,48 @@ def text_to_audio_elevenlabs_sdk(
         if not api_key:
             raise ValueError("ElevenLabs API key is required.")
 
+        store = get_audio_store(output_dir)
+        engine = f"elevenlabs:{voice_id}:{model_id}:{output_format}"
+        existing = store.lookup(text, engine)
+        if existing is not None:
+            return str(existing)
+
         # Initialize client
         client = ElevenLabs(api_key=api_key)
 
-        # Get the audio generator
-        audio_stream = client.text_to_speech.convert(
-            text=text, voice_id=voice_id, model_id=model_id, output_format=output_format
-        )
-
-        # Ensure output directory exists
-        os.makedirs(output_dir, exist_ok=True)
-
-        # Generate unique filename
-        filename = f"tts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp3"
-        filepath = os.path.join(output_dir, filename)
-
-        # Write audio chunks to file
-        with open(filepath, "wb") as f:
-            for chunk in audio_stream:
-                f.write(chunk)
+        if chunked is None:
+            chunked = TTS_CHUNKED
+        if chunked and output_format.startswith("mp3"):
+            def render(
+                chunk: str, previous: Optional[str], following: Optional[str]
+            ) -> bytes:
+                context = {"previous_text": previous, "next_text": following}
+                return b"".join(
+                    client.text_to_speech.convert(
+                        text=chunk,
+                        voice_id=voice_id,
+                        model_id=model_id,
+                        output_format=output_format,
+                        **{k: v for k, v in context.items() if v},
+                    )
+                )
+
+            audio_stream = [
+                synthesize_chunked(
+                    text, synthesize=render, engine=engine, with_context=True
+                )
+            ]
+        else:
+            # Get the audio generator
+            audio_stream = client.text_to_speech.convert(
+                text=text,
+                voice_id=voice_id,
+                model_id=model_id,
+                output_format=output_format,
+            )
 
-        return filepath
+        # Save under a name derived from the script, so it can be reused
+        return str(store.save(text, engine, b"".join(audio_stream)))
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"ElevenLabs error: {str(e)}")
@@ -406,14 +928,20 @@ def text_to_audio_elevenlabs_sdk(
 
 Audio_Dir = Path("audio")
 Audio_Dir.mkdir(exist_ok=True)
+audio_store = get_audio_store(Audio_Dir)
+
 
+tts_flights = SingleFlight()
 
-def tts_to_audio(text: str, language: str = "en") -> str:
+
+def tts_to_audio(text: str, language: str = "en", chunked: bool = None) -> str:
     """Convert text to speech using gTTS (Google Text-to-Speech) and save to file.
 
     Args:
         text: Input text to convert
         language: Language code (default: 'en')
+        chunked: Synthesize sentence-aligned chunks in parallel and join them
+            at MP3 frame level (default: TTS_CHUNKED env var, on)
 
     Returns:
         str: Path to saved audio file
@@ -423,13 +951,24 @@ def tts_to_audio(text: str, language: str = "en") -> str:
     """
 
     try:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = Audio_Dir / f"tts_{timestamp}.mp3"
+        engine = f"gtts:{language}"
+
+        def render() -> str:
+            existing = audio_store.lookup(text, engine)
+            if existing is not None:
+                return str(existing)
+
+            if chunked if chunked is not None else TTS_CHUNKED:
+                audio = synthesize_chunked(text, language)
+            else:
+                buffer = io.BytesIO()
+                gTTS(text=text, lang=language, slow=False).write_to_fp(buffer)
+                audio = buffer.getvalue()
 
-        tts = gTTS(text=text, lang=language, slow=False)
-        tts.save(str(filename))
+            return str(audio_store.save(text, engine, audio))
 
-        return str(filename)
+        # Concurrent requests for the same script share one render
+        return tts_flights.do(audio_store.artifact_name(text, engine), render)
 
     except Exception as e:
         # Raise an HTTPException for better integration with a FastAPI backend